@@ -1,11 +1,44 @@
+import atexit
 import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
 
 from api.config import settings
 
+RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({})).keys()) | {'message', 'asctime'}
+
+
+class StructuredFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = [
+            f'{key}={value}' for key, value in vars(record).items()
+            if key not in RECORD_ATTRIBUTES
+        ]
+        if fields:
+            line = f'{line} | {" ".join(fields)}'
+        return line
+
 
 def configure_logging(level=settings.LOGGING_LEVEL):
-    logging.basicConfig(
-        level=level,
+    handler = logging.StreamHandler()
+    handler.setFormatter(StructuredFormatter(
         datefmt='%Y-%m-%d %H:%M:%S',
-        format='[%(asctime)s.%(msecs)03d] %(module)20s:%(lineno)-3d %(levelname)-7s - %(message)s'
-    )
\ No newline at end of file
+        fmt='[%(asctime)s.%(msecs)03d] %(module)20s:%(lineno)-3d %(levelname)-7s - %(message)s'
+    ))
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for old_handler in root.handlers[:]:
+        root.removeHandler(old_handler)
+    root.addHandler(QueueHandler(log_queue))
+
+    listener.start()
+    atexit.register(listener.stop)
+
+
+def sample_debug(logger: logging.Logger) -> bool:
+    return logger.isEnabledFor(logging.DEBUG) and random.random() < settings.LOG_SAMPLE_RATE
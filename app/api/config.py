@@ -1,4 +1,5 @@
 import os
+from enum import StrEnum
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -8,6 +9,12 @@ load_dotenv(dotenv_path)
 BASE_DIR = Path(__file__).resolve().parent
 
 
+class OutboundOverflowPolicy(StrEnum):
+    DISCONNECT = 'disconnect'
+    DROP = 'drop'
+    COALESCE = 'coalesce'
+
+
 class Settings:
     POSTGRES_USER = os.getenv("POSTGRES_USER")
     POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
@@ -15,12 +22,54 @@ class Settings:
     POSTGRES_PORT = os.getenv("POSTGRES_PORT")
     POSTGRES_DB = os.getenv("POSTGRES_DB")
 
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
     REDIS_PORT = 6379
 
     LOGGING_LEVEL = int(os.getenv("LOGGING_LEVEL"))
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1.0))
 
     GRID_SIZE_X = int(os.getenv("GRID_SIZE_X"))
     GRID_SIZE_Y = int(os.getenv("GRID_SIZE_Y"))
+    FLEET = os.getenv("FLEET", "4,3,3,2,2,2,1,1,1,1")
+
+    WRITE_BEHIND_INTERVAL = int(os.getenv("WRITE_BEHIND_INTERVAL", 50))
+
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+    BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", 2))
+
+    LOBBY_PAGE_SIZE = int(os.getenv("LOBBY_PAGE_SIZE", 50))
+    LOBBY_MAX_PAGE_SIZE = int(os.getenv("LOBBY_MAX_PAGE_SIZE", 200))
+    LOBBY_CACHE_TTL = int(os.getenv("LOBBY_CACHE_TTL", 2))
+
+    PLAYER_CACHE_SIZE = int(os.getenv("PLAYER_CACHE_SIZE", 10000))
+    PLAYER_CACHE_TTL = int(os.getenv("PLAYER_CACHE_TTL", 60))
+
+    SESSION_IDLE_TTL = int(os.getenv("SESSION_IDLE_TTL", 3600))
+    SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", 86400))
+    REAPER_INTERVAL = int(os.getenv("REAPER_INTERVAL", 60))
+    REAPER_BATCH_SIZE = int(os.getenv("REAPER_BATCH_SIZE", 500))
+
+    RECONNECT_GRACE = int(os.getenv("RECONNECT_GRACE", 30))
+
+    OUTBOUND_QUEUE_SIZE = int(os.getenv("OUTBOUND_QUEUE_SIZE", 256))
+    OUTBOUND_OVERFLOW_POLICY = OutboundOverflowPolicy(os.getenv("OUTBOUND_OVERFLOW_POLICY", "disconnect"))
+    OUTBOUND_SEND_TIMEOUT = float(os.getenv("OUTBOUND_SEND_TIMEOUT", 10))
+
+    WS_MESSAGE_RATE = float(os.getenv("WS_MESSAGE_RATE", 20))
+    WS_MESSAGE_BURST = float(os.getenv("WS_MESSAGE_BURST", 40))
+    WS_TYPE_RATE = float(os.getenv("WS_TYPE_RATE", 10))
+    WS_TYPE_BURST = float(os.getenv("WS_TYPE_BURST", 20))
+    WS_MAX_INVALID_FRAMES = int(os.getenv("WS_MAX_INVALID_FRAMES", 20))
+
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/profiles")
+    PROFILE_INTERVAL = int(os.getenv("PROFILE_INTERVAL", 5))
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.0))
 
 
 settings = Settings()
\ No newline at end of file
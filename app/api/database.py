@@ -1,3 +1,4 @@
+import redis.asyncio as redis
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy import MetaData
 
@@ -5,6 +6,21 @@ from api.config import settings
 
 SQLALCHEMY_DATABASE_URL = f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
 
-engine = create_async_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+autocommit_engine = engine.execution_options(isolation_level='AUTOCOMMIT')
 
 metadata = MetaData()
+
+REDIS_URL = f'redis://redis:{settings.REDIS_PORT}'
+
+redis_pool = redis.ConnectionPool.from_url(REDIS_URL)
+
+redis_client = redis.Redis(connection_pool=redis_pool)
@@ -21,3 +21,8 @@ class BaseWebSocketException(WebSocketException):
             code=self.code,
             reason=self.reason
         )
+
+
+class HttpAdminForbidden(BaseHTTPException):
+    status_code = status.HTTP_403_FORBIDDEN
+    detail = "Admin token required"
@@ -1,14 +1,50 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from api.common import configure_logging
+from api.config import settings
+from api.database import engine, redis_client, redis_pool
+from api.profiler import profiler
+from api.routers import admin_router, router as metrics_router
+from api.session.backplane import backplane
+from api.session.game_state import writer
+from api.session.lobby_manager import lobby
+from api.session.reaper import reaper
+from api.session.redis_services import load_scripts
 from api.session.routers import router as session_router
+from api.session.services import subscribe_player_context_invalidation
+from api.session.utils import password_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await load_scripts()
+    await backplane.start()
+    await lobby.start()
+    await subscribe_player_context_invalidation()
+    await profiler.start()
+    writer.start()
+    await reaper.start()
+    yield
+    await reaper.stop()
+    await writer.stop()
+    await backplane.stop()
+    await redis_client.aclose()
+    await redis_pool.aclose()
+    await engine.dispose()
+    password_executor.shutdown(wait=False, cancel_futures=True)
+
 
 app = FastAPI(
     title="API",
     docs_url="/api/v1/docs",
     redoc_url="/api/v1/redoc",
+    lifespan=lifespan,
 )
 
 app.include_router(session_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
 
-configure_logging(level=10)
+configure_logging(level=settings.LOGGING_LEVEL)
@@ -0,0 +1,176 @@
+from bisect import bisect_left
+from functools import wraps
+from time import perf_counter_ns
+from typing import Callable
+
+from api.profiler import current_profile
+
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+
+class CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+
+class HistogramChild:
+    __slots__ = ('bounds', 'counts', 'total')
+
+    def __init__(self, bounds: list[int]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+
+    def observe(self, nanoseconds: int) -> None:
+        self.counts[bisect_left(self.bounds, nanoseconds)] += 1
+        self.total += nanoseconds
+
+
+class Counter:
+    __slots__ = ('name', 'description', 'label', 'children')
+
+    def __init__(self, name: str, description: str, label: str) -> None:
+        self.name = name
+        self.description = description
+        self.label = label
+        self.children: dict[str, CounterChild] = {}
+
+    def labels(self, value: str) -> CounterChild:
+        child = self.children.get(value)
+        if child is None:
+            child = self.children[value] = CounterChild()
+        return child
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} counter']
+        for value, child in self.children.items():
+            lines.append(f'{self.name}{{{self.label}="{value}"}} {child.value}')
+        return lines
+
+
+class Histogram:
+    __slots__ = ('name', 'description', 'label', 'buckets', 'bounds', 'children')
+
+    def __init__(self, name: str, description: str, label: str, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.description = description
+        self.label = label
+        self.buckets = buckets
+        self.bounds = [round(bucket * 1e9) for bucket in buckets]
+        self.children: dict[str, HistogramChild] = {}
+
+    def labels(self, value: str) -> HistogramChild:
+        child = self.children.get(value)
+        if child is None:
+            child = self.children[value] = HistogramChild(self.bounds)
+        return child
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        for value, child in self.children.items():
+            counts = list(child.counts)
+            label = f'{self.label}="{value}"'
+            cumulative = 0
+            for bucket, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bucket}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label}}} {child.total / 1e9}')
+            lines.append(f'{self.name}_count{{{label}}} {cumulative}')
+        return lines
+
+
+class Gauge:
+    __slots__ = ('name', 'description', 'function')
+
+    def __init__(self, name: str, description: str, function: Callable[[], float]) -> None:
+        self.name = name
+        self.description = description
+        self.function = function
+
+    def render(self) -> list[str]:
+        return [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} gauge', f'{self.name} {self.function()}']
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.metrics: dict[str, Counter | Histogram | Gauge] = {}
+
+    def counter(self, name: str, description: str, label: str) -> Counter:
+        return self.register(Counter(name, description, label))
+
+    def histogram(self, name: str, description: str, label: str) -> Histogram:
+        return self.register(Histogram(name, description, label))
+
+    def gauge(self, name: str, description: str, function: Callable[[], float]) -> Gauge:
+        return self.register(Gauge(name, description, function))
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        lines.append('')
+        return '\n'.join(lines)
+
+
+def timed(histogram: Histogram):
+    def decorator(function):
+        child = histogram.labels(function.__name__)
+        span = f'{function.__module__.rsplit(".", 1)[-1]}.{function.__name__}'
+
+        @wraps(function)
+        async def wrapper(*args, **kwargs):
+            started = perf_counter_ns()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                duration = perf_counter_ns() - started
+                child.observe(duration)
+                profile = current_profile.get()
+                if profile is not None:
+                    profile.record(span, duration)
+        return wrapper
+    return decorator
+
+
+registry = MetricsRegistry()
+
+ws_handling_duration = registry.histogram(
+    'battleship_ws_handling_seconds', 'Time spent handling a received websocket message', 'type'
+)
+ws_send_duration = registry.histogram(
+    'battleship_ws_send_seconds', 'Time from queueing a websocket message to sending or publishing it', 'type'
+)
+ws_outbound_overflow = registry.counter(
+    'battleship_ws_outbound_overflow_total', 'Outbound messages hitting a full connection queue', 'action'
+)
+ws_invalid_messages = registry.counter(
+    'battleship_ws_invalid_messages_total', 'Received websocket frames that failed to parse', 'encoding'
+)
+ws_rejected_messages = registry.counter(
+    'battleship_ws_rejected_messages_total', 'Inbound websocket frames rejected by the server', 'reason'
+)
+ws_flood_disconnects = registry.counter(
+    'battleship_ws_flood_disconnects_total', 'Websockets closed for sending too many rejected frames', 'reason'
+)
+redis_duration = registry.histogram(
+    'battleship_redis_seconds', 'Duration of redis calls', 'operation'
+)
+postgres_duration = registry.histogram(
+    'battleship_postgres_seconds', 'Duration of postgres queries', 'statement'
+)
+bcrypt_duration = registry.histogram(
+    'battleship_bcrypt_seconds', 'Duration of password hashing and checks, including executor wait', 'operation'
+)
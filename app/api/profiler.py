@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from types import CodeType, FrameType
+from uuid import UUID
+
+import orjson
+
+from api.config import settings
+from api.schemas import ProfilingTargets
+from api.session.backplane import backplane
+
+logger = logging.getLogger(__name__)
+
+PROFILER_CHANNEL = 'admin:profiling'
+
+
+def frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = '/'.join(code.co_filename.rsplit('/', 2)[-2:])
+    return f'{code.co_qualname} ({filename}:{frame.f_lineno})'
+
+
+class ConnectionProfile:
+    __slots__ = ('player_id', 'session_id', 'task', 'root', 'started', 'samples', 'spans')
+
+    def __init__(self, player_id: UUID, session_id: UUID, task: asyncio.Task, root: CodeType) -> None:
+        self.player_id = player_id
+        self.session_id = session_id
+        self.task = task
+        self.root = root
+        self.started = time.time()
+        self.samples: dict[str, int] = {}
+        self.spans: dict[str, list[int]] = {}
+
+    def record(self, name: str, nanoseconds: int) -> None:
+        span = self.spans.get(name)
+        if span is None:
+            self.spans[name] = [1, nanoseconds, nanoseconds]
+            return
+        span[0] += 1
+        span[1] += nanoseconds
+        if nanoseconds > span[2]:
+            span[2] = nanoseconds
+
+    def sample(self, running_frame: FrameType | None) -> None:
+        if running_frame is not None:
+            stack = self.__thread_stack(running_frame)
+            state = 'running'
+        else:
+            stack = self.__await_stack()
+            state = 'waiting'
+        if stack:
+            key = ';'.join([state, *stack])
+            self.samples[key] = self.samples.get(key, 0) + 1
+
+    def dump(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{time.strftime("%Y%m%d-%H%M%S")}-{self.player_id}')
+        with open(f'{path}.folded', 'w') as file:
+            for stack, count in self.samples.items():
+                file.write(f'{stack} {count}\n')
+        with open(f'{path}.spans.json', 'wb') as file:
+            file.write(orjson.dumps({
+                'playerId': str(self.player_id),
+                'sessionId': str(self.session_id),
+                'duration': time.time() - self.started,
+                'spans': {
+                    name: {'count': count, 'totalMs': total / 1e6, 'maxMs': longest / 1e6}
+                    for name, (count, total, longest) in self.spans.items()
+                },
+            }, option=orjson.OPT_INDENT_2))
+        return path
+
+    def __thread_stack(self, frame: FrameType) -> list[str]:
+        stack = []
+        while frame is not None:
+            stack.append(frame_name(frame))
+            if frame.f_code is self.root:
+                break
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def __await_stack(self) -> list[str]:
+        stack = []
+        awaitable = self.task.get_coro()
+        while awaitable is not None:
+            frame = getattr(awaitable, 'cr_frame', None) or getattr(awaitable, 'gi_frame', None)
+            if frame is None:
+                break
+            if stack or frame.f_code is self.root:
+                stack.append(frame_name(frame))
+            awaitable = getattr(awaitable, 'cr_await', None) or getattr(awaitable, 'gi_yieldfrom', None)
+        return stack
+
+
+current_profile: ContextVar[ConnectionProfile | None] = ContextVar('current_profile', default=None)
+
+
+class Profiler:
+    def __init__(self, interval: float, directory: str, sample_rate: float) -> None:
+        self.interval = interval
+        self.directory = directory
+        self.targets = ProfilingTargets(sample_rate=sample_rate)
+        self.players: frozenset[UUID] = frozenset()
+        self.sessions: frozenset[UUID] = frozenset()
+        self.sample_rate = sample_rate
+        self.profiles: dict[asyncio.Task, ConnectionProfile] = {}
+        self.lock = threading.Lock()
+        self.thread: threading.Thread | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.loop_thread_id: int | None = None
+
+    async def start(self) -> None:
+        await backplane.subscribe(PROFILER_CHANNEL, self.__receive_targets)
+
+    async def configure(self, targets: ProfilingTargets) -> None:
+        await backplane.publish(PROFILER_CHANNEL, targets.model_dump_json())
+
+    def apply(self, targets: ProfilingTargets) -> None:
+        self.targets = targets
+        self.players = frozenset(targets.players)
+        self.sessions = frozenset(targets.sessions)
+        self.sample_rate = targets.sample_rate
+        logger.info(
+            'Profiling targets updated, players: %s, sessions: %s, sample rate: %s',
+            len(self.players), len(self.sessions), self.sample_rate
+        )
+
+    def begin(self, player_id: UUID, session_id: UUID) -> None:
+        if not (
+            player_id in self.players
+            or session_id in self.sessions
+            or (self.sample_rate and random.random() < self.sample_rate)
+        ):
+            return
+
+        task = asyncio.current_task()
+        profile = ConnectionProfile(player_id, session_id, task, sys._getframe(1).f_code)
+        current_profile.set(profile)
+        task.add_done_callback(self.__end)
+        with self.lock:
+            self.profiles[task] = profile
+            if self.thread is None:
+                self.loop = asyncio.get_running_loop()
+                self.loop_thread_id = threading.get_ident()
+                self.thread = threading.Thread(target=self.__run, name='profiler', daemon=True)
+                self.thread.start()
+        logger.info('Connection profiling started, session_id: %s, player_id: %s', session_id, player_id)
+
+    def active(self) -> list[UUID]:
+        with self.lock:
+            return [profile.player_id for profile in self.profiles.values()]
+
+    def __end(self, task: asyncio.Task) -> None:
+        with self.lock:
+            profile = self.profiles.pop(task, None)
+        if profile is not None:
+            self.loop.run_in_executor(None, self.__dump, profile)
+
+    def __dump(self, profile: ConnectionProfile) -> None:
+        try:
+            path = profile.dump(self.directory)
+        except OSError:
+            logger.exception('Cannot write connection profile, player_id: %s', profile.player_id)
+            return
+        logger.info('Connection profile written, player_id: %s, path: %s', profile.player_id, path)
+
+    def __run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                if not self.profiles:
+                    self.thread = None
+                    return
+                running_task = asyncio.current_task(self.loop)
+                running_frame = sys._current_frames().get(self.loop_thread_id)
+                if asyncio.current_task(self.loop) is not running_task:
+                    running_task = running_frame = None
+                for profile in self.profiles.values():
+                    try:
+                        profile.sample(running_frame if profile.task is running_task else None)
+                    except (AttributeError, RuntimeError, ValueError):
+                        continue
+
+    async def __receive_targets(self, message: dict) -> None:
+        self.apply(ProfilingTargets.model_validate_json(message['data']))
+
+
+profiler = Profiler(settings.PROFILE_INTERVAL / 1000, settings.PROFILE_DIR, settings.PROFILE_SAMPLE_RATE)
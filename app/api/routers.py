@@ -0,0 +1,48 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, Response
+
+from api.config import settings
+from api.exceptions import HttpAdminForbidden
+from api.metrics import registry
+from api.profiler import profiler
+from api.schemas import ProfilingStatus, ProfilingTargets
+
+router = APIRouter(tags=["Metrics"])
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    if not settings.ADMIN_TOKEN or x_admin_token is None:
+        raise HttpAdminForbidden
+    if not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HttpAdminForbidden
+
+
+admin_router = APIRouter(
+    prefix="/api/v1/admin",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin)],
+)
+
+
+@router.get('/metrics', include_in_schema=False)
+async def get_metrics():
+    return Response(content=registry.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@admin_router.get('/profiling', response_model=ProfilingStatus)
+async def get_profiling():
+    return ProfilingStatus(**profiler.targets.model_dump(), active=profiler.active())
+
+
+@admin_router.put('/profiling', response_model=ProfilingTargets)
+async def set_profiling(targets: ProfilingTargets):
+    await profiler.configure(targets)
+    return targets
+
+
+@admin_router.delete('/profiling', response_model=ProfilingTargets)
+async def clear_profiling():
+    targets = ProfilingTargets()
+    await profiler.configure(targets)
+    return targets
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
 from pydantic.alias_generators import to_camel
 
 
@@ -8,3 +10,13 @@ class BaseSchema(BaseModel):
         populate_by_name=True,
         from_attributes=True,
     )
+
+
+class ProfilingTargets(BaseSchema):
+    players: list[UUID] = []
+    sessions: list[UUID] = []
+    sample_rate: float = Field(default=0.0, ge=0.0, le=1.0)
+
+
+class ProfilingStatus(ProfilingTargets):
+    active: list[UUID]
@@ -1,4 +1,59 @@
-from api.database import engine
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from time import perf_counter_ns
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from api.database import engine, autocommit_engine
+from api.metrics import postgres_duration
+from api.profiler import current_profile
+
+
+class UnitOfWork:
+    __slots__ = ('connection', 'commit_callbacks')
+
+    def __init__(self) -> None:
+        self.connection: AsyncConnection | None = None
+        self.commit_callbacks: list[Callable[[], Awaitable[None]]] = []
+
+    async def get_connection(self) -> AsyncConnection:
+        if self.connection is None:
+            self.connection = await engine.connect()
+            await self.connection.begin()
+        return self.connection
+
+
+current_unit_of_work: ContextVar[UnitOfWork | None] = ContextVar('current_unit_of_work', default=None)
+
+
+@asynccontextmanager
+async def transaction():
+    if current_unit_of_work.get() is not None:
+        yield
+        return
+
+    unit_of_work = UnitOfWork()
+    token = current_unit_of_work.set(unit_of_work)
+    try:
+        yield
+        if unit_of_work.connection is not None:
+            await unit_of_work.connection.commit()
+    finally:
+        current_unit_of_work.reset(token)
+        if unit_of_work.connection is not None:
+            await unit_of_work.connection.close()
+
+    for callback in unit_of_work.commit_callbacks:
+        await callback()
+
+
+async def after_commit(callback: Callable[[], Awaitable[None]]) -> None:
+    unit_of_work = current_unit_of_work.get()
+    if unit_of_work is None:
+        await callback()
+    else:
+        unit_of_work.commit_callbacks.append(callback)
 
 
 async def execute_query(
@@ -7,11 +62,36 @@ async def execute_query(
         return_result: bool = True,
         first_only: bool = True
 ):
-    async with engine.connect() as connection:
+    started = perf_counter_ns()
+    try:
+        return await run_query(query, commit, return_result, first_only)
+    finally:
+        duration = perf_counter_ns() - started
+        postgres_duration.labels(query.__visit_name__).observe(duration)
+        profile = current_profile.get()
+        if profile is not None:
+            profile.record(f'postgres.{query.__visit_name__}', duration)
+
+
+async def run_query(query, commit: bool, return_result: bool, first_only: bool):
+    unit_of_work = current_unit_of_work.get()
+    if unit_of_work is not None:
+        connection = await unit_of_work.get_connection()
         result = await connection.execute(query)
-        if commit is True:
-            await connection.commit()
-        if return_result is True:
-            if first_only is True:
-                return result.fetchone()
-            return result.fetchall()
+        return fetch_result(result, return_result, first_only)
+
+    if commit is True:
+        async with engine.begin() as connection:
+            result = await connection.execute(query)
+            return fetch_result(result, return_result, first_only)
+
+    async with autocommit_engine.connect() as connection:
+        result = await connection.execute(query)
+        return fetch_result(result, return_result, first_only)
+
+
+def fetch_result(result, return_result: bool, first_only: bool):
+    if return_result is True:
+        if first_only is True:
+            return result.fetchone()
+        return result.fetchall()
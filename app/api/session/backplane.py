@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from redis.asyncio.client import PubSub
+
+from api.database import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class Backplane:
+    def __init__(self) -> None:
+        self.pubsub: PubSub | None = None
+        self.task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self.pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+            self.pubsub = None
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.pubsub.run(poll_timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Backplane reader failed, restarting')
+                await asyncio.sleep(1)
+
+    async def subscribe(self, channel: str, handler: Callable[[dict], Awaitable[None]]) -> None:
+        await self.pubsub.subscribe(**{channel: handler})
+
+    async def unsubscribe(self, channel: str) -> None:
+        await self.pubsub.unsubscribe(channel)
+
+    async def publish(self, channel: str, data: str) -> int:
+        return await redis_client.publish(channel, data)
+
+    async def count_subscribers(self, channel: str) -> int:
+        [(_, count)] = await redis_client.pubsub_numsub(channel)
+        return count
+
+    async def count_subscribers_many(self, channels: list[str]) -> list[int]:
+        return [count for _, count in await redis_client.pubsub_numsub(*channels)]
+
+
+backplane = Backplane()
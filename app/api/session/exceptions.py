@@ -1,4 +1,5 @@
 from fastapi import status
+from starlette.websockets import WebSocketDisconnect
 
 from api.exceptions import BaseHTTPException, BaseWebSocketException
 
@@ -33,6 +34,11 @@ class HttpInvalidPasswordLength(BaseHTTPException):
     detail = "Password must be at least 1 character"
 
 
+class HttpInvalidCursor(BaseHTTPException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    detail = "Invalid cursor"
+
+
 class WsPlayerNotFound(BaseWebSocketException):
     code = status.WS_1003_UNSUPPORTED_DATA
     reason = "Player not found"
@@ -56,3 +62,14 @@ class WsInvalidJsonFormat(BaseWebSocketException):
 class WsEnemyNotFound(BaseWebSocketException):
     code = status.WS_1011_INTERNAL_ERROR
     reason = "Enemy not found"
+
+
+class WsTooManyInvalidFrames(WebSocketDisconnect):
+    code = status.WS_1008_POLICY_VIOLATION
+    reason = "Too many invalid frames"
+
+    def __init__(self):
+        super().__init__(
+            code=self.code,
+            reason=self.reason
+        )
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from typing import Literal
+from uuid import UUID
+
+from api.config import settings
+from api.session import redis_services
+from api.session.schemas import EntityData
+
+logger = logging.getLogger(__name__)
+
+
+class PlayerBoard:
+    __slots__ = (
+        'hits',
+        'remaining',
+        'entity_sizes',
+        'entity_hits',
+        'cell_entities',
+        'new_hits',
+        'changed_entities'
+    )
+
+    def __init__(self, entities: dict[UUID, EntityData]) -> None:
+        self.hits: set[int] = set()
+        self.entity_sizes: dict[str, int] = {}
+        self.cell_entities: dict[int, str] = {}
+        for entity_id, entity in entities.items():
+            entity_id = str(entity_id)
+            self.entity_sizes[entity_id] = entity.size
+            self.cell_entities.update(dict.fromkeys(entity.cells, entity_id))
+        self.entity_hits = dict.fromkeys(self.entity_sizes, 0)
+        self.remaining = len(self.cell_entities)
+        self.new_hits: list[int] = []
+        self.changed_entities: set[str] = set()
+
+
+class GameState:
+    __slots__ = ('session_id', 'boards', 'turn', 'version', 'stale')
+
+    def __init__(self, session_id: UUID) -> None:
+        self.session_id = session_id
+        self.boards: dict[UUID, PlayerBoard] = {}
+        self.turn: UUID | None = None
+        self.version = 0
+        self.stale = False
+
+    def add_player(
+            self,
+            player_id: UUID,
+            entities: dict[UUID, EntityData]
+    ) -> None:
+        self.boards[player_id] = PlayerBoard(entities)
+
+    def resolve_hit(
+            self,
+            player_id: UUID,
+            cell: int
+    ) -> tuple[Literal['miss', 'hit', 'destroy', 'win', 'repeat'], str]:
+        board = self.boards[player_id]
+        if cell in board.hits:
+            return 'repeat', ''
+        board.hits.add(cell)
+        board.new_hits.append(cell)
+
+        entity_id = board.cell_entities.get(cell)
+        if entity_id is None:
+            return 'miss', ''
+
+        board.remaining -= 1
+        if board.remaining <= 0:
+            return 'win', entity_id
+
+        board.entity_hits[entity_id] += 1
+        board.changed_entities.add(entity_id)
+        if board.entity_hits[entity_id] >= board.entity_sizes[entity_id]:
+            return 'destroy', entity_id
+        return 'hit', entity_id
+
+    def pop_changes(self) -> tuple[UUID, UUID | None, int, list[tuple[UUID, list[int], int, dict[str, int]]]]:
+        changes = []
+        for player_id, board in self.boards.items():
+            if not board.new_hits:
+                continue
+            entity_hits = {entity_id: board.entity_hits[entity_id] for entity_id in board.changed_entities}
+            changes.append((player_id, board.new_hits, board.remaining, entity_hits))
+            board.new_hits = []
+            board.changed_entities = set()
+        self.version += 1
+        return self.session_id, self.turn, self.version - 1, changes
+
+
+class GameStateWriter:
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.dirty: dict[UUID, GameState] = {}
+        self.pending: list[tuple[GameState, tuple[UUID, UUID | None, int, list]]] = []
+        self.task: asyncio.Task | None = None
+
+    def mark(self, game: GameState) -> None:
+        self.dirty[game.session_id] = game
+
+    def collect(self, game: GameState) -> None:
+        if self.dirty.pop(game.session_id, None) is not None:
+            self.pending.append((game, game.pop_changes()))
+
+    def discard(self, session_id: UUID) -> None:
+        self.dirty.pop(session_id, None)
+        self.pending = [(game, change) for game, change in self.pending if game.session_id != session_id]
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        await self.flush()
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception('Game state flush to redis failed')
+
+    async def flush(self) -> None:
+        games, self.dirty = self.dirty, {}
+        self.pending.extend((game, game.pop_changes()) for game in games.values())
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        try:
+            saved = await redis_services.save_game_changes([change for _, change in pending])
+        except Exception:
+            self.pending = pending + self.pending
+            raise
+        for (game, _), is_saved in zip(pending, saved):
+            if not is_saved and not game.stale:
+                game.stale = True
+                logger.warning('Game state changed in redis by another worker, session_id: %s', game.session_id)
+        logger.debug('Game state flushed to redis, changes: %s', len(pending))
+
+
+writer = GameStateWriter(settings.WRITE_BEHIND_INTERVAL / 1000)
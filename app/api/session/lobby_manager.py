@@ -0,0 +1,58 @@
+import logging
+from uuid import UUID, uuid4
+
+from fastapi import WebSocket
+
+from api.session import redis_services
+from api.session.backplane import backplane
+from api.session.outbound import OutboundQueue
+from api.session.websocket_frames import encode_message
+from api.session.websocket_request_types import WsRequestType
+
+logger = logging.getLogger(__name__)
+
+LOBBY_CHANNEL = 'ws:lobby'
+
+
+class LobbyManager:
+    def __init__(self):
+        self.subscribers: dict[WebSocket, OutboundQueue] = {}
+
+    async def start(self) -> None:
+        await backplane.subscribe(LOBBY_CHANNEL, self.__broadcast)
+
+    async def connect(self, websocket: WebSocket) -> None:
+        await websocket.accept()
+        subscriber = self.subscribers[websocket] = OutboundQueue(uuid4(), websocket)
+        subscriber.start()
+        logger.debug('Lobby websocket connected, subscribers: %s', len(self.subscribers))
+
+    def disconnect(self, websocket: WebSocket) -> None:
+        subscriber = self.subscribers.pop(websocket, None)
+        if subscriber is not None:
+            subscriber.stop()
+        logger.debug('Lobby websocket disconnected, subscribers: %s', len(self.subscribers))
+
+    async def send_session_added_message(self, session_id: UUID, name: str) -> None:
+        await self.__publish(WsRequestType.SESSION_ADDED, {'id': str(session_id), 'name': name})
+
+    async def send_session_filled_message(self, session_id: UUID) -> None:
+        await self.__publish(WsRequestType.SESSION_FILLED, {'id': str(session_id)})
+
+    async def send_session_removed_message(self, session_id: UUID) -> None:
+        await self.__publish(WsRequestType.SESSION_REMOVED, {'id': str(session_id)})
+
+    async def __publish(self, message_type: WsRequestType, detail: dict) -> None:
+        data = encode_message(message_type, detail)
+        await redis_services.publish_lobby_change(LOBBY_CHANNEL, data)
+
+    async def __broadcast(self, message: dict) -> None:
+        if not self.subscribers:
+            return
+        data = message['data'].decode('utf-8')
+        for subscriber in self.subscribers.values():
+            subscriber.send(None, data)
+        logger.debug('Lobby change queued, subscribers: %s, size: %s', len(self.subscribers), len(data))
+
+
+lobby = LobbyManager()
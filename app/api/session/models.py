@@ -6,7 +6,8 @@ from sqlalchemy import (
     ForeignKey,
     Boolean,
     DateTime,
-    Table
+    Table,
+    Index
 )
 from sqlalchemy.dialects.postgresql import BYTEA
 
@@ -19,6 +20,10 @@ session = Table(
     Column('password', BYTEA, nullable=False),
     Column('is_ready', Boolean, nullable=False, server_default=text("false")),
     Column('created_at', DateTime, nullable=False, server_default=text("now()")),
+    Column('last_activity', DateTime, nullable=False, server_default=text("now()")),
+    Index('ix_session_lobby', 'created_at', 'id', postgresql_where=text('NOT is_ready')),
+    Index('ix_session_name_pattern', 'name', postgresql_ops={'name': 'text_pattern_ops'}),
+    Index('ix_session_last_activity', 'last_activity'),
 )
 
 
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from collections import deque
+from time import perf_counter_ns
+from uuid import UUID
+
+from fastapi import WebSocket, status
+from starlette.websockets import WebSocketDisconnect, WebSocketState
+
+from api.common import sample_debug
+from api.config import OutboundOverflowPolicy, settings
+from api.metrics import ws_outbound_overflow, ws_send_duration
+from api.session.websocket_request_types import WsRequestType
+
+logger = logging.getLogger(__name__)
+
+outbound_dropped = ws_outbound_overflow.labels('dropped')
+outbound_coalesced = ws_outbound_overflow.labels('coalesced')
+outbound_disconnected = ws_outbound_overflow.labels('disconnected')
+
+COALESCED_TYPES = frozenset((
+    WsRequestType.ENEMY_JOINED,
+    WsRequestType.ENEMY_LEFT,
+    WsRequestType.START_SESSION,
+    WsRequestType.ENEMY_PLACEMENT_READY,
+    WsRequestType.START_GAME,
+    WsRequestType.ENEMY_ENTITIES,
+    WsRequestType.YOUR_TURN,
+    WsRequestType.SNAPSHOT,
+))
+
+
+class OutboundQueue:
+    __slots__ = ('connection_id', 'websocket', 'binary', 'queue', 'ready', 'overflowed', 'writer')
+
+    def __init__(self, connection_id: UUID, websocket: WebSocket, binary: bool = False) -> None:
+        self.connection_id = connection_id
+        self.websocket = websocket
+        self.binary = binary
+        self.queue: deque[tuple[WsRequestType | None, str | bytes, int]] = deque()
+        self.ready = asyncio.Event()
+        self.overflowed = False
+        self.writer: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self.writer = asyncio.create_task(self.__write())
+
+    def stop(self) -> None:
+        if self.writer is not None:
+            self.writer.cancel()
+            self.writer = None
+        self.queue.clear()
+
+    def send(self, message_type: WsRequestType | None, data: str | bytes) -> None:
+        if self.overflowed:
+            return
+        if len(self.queue) >= settings.OUTBOUND_QUEUE_SIZE:
+            policy = settings.OUTBOUND_OVERFLOW_POLICY
+            if policy is OutboundOverflowPolicy.DROP:
+                outbound_dropped.inc()
+                logger.warning('Outbound queue full, message dropped, connection_id: %s', self.connection_id)
+                return
+            if policy is not OutboundOverflowPolicy.COALESCE or not self.__coalesce(message_type):
+                logger.warning('Outbound queue full, disconnecting websocket, connection_id: %s', self.connection_id)
+                self.__overflow()
+                return
+        self.queue.append((message_type, data, perf_counter_ns()))
+        self.ready.set()
+
+    def __coalesce(self, message_type: WsRequestType | None) -> bool:
+        if message_type not in COALESCED_TYPES:
+            return False
+        for index, (queued_type, _, _) in enumerate(self.queue):
+            if queued_type is message_type:
+                del self.queue[index]
+                outbound_coalesced.inc()
+                return True
+        return False
+
+    def __overflow(self) -> None:
+        outbound_disconnected.inc()
+        self.overflowed = True
+        self.queue.clear()
+        if self.writer is not None:
+            self.writer.cancel()
+        self.writer = asyncio.create_task(self.__close())
+
+    async def __write(self) -> None:
+        connection = self.websocket
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            while self.queue:
+                message_type, data, queued = self.queue.popleft()
+                if connection.client_state != WebSocketState.CONNECTED:
+                    logger.warning(
+                        'Cannot send message to disconnected websocket, connection_id: %s',
+                        self.connection_id
+                    )
+                    continue
+                try:
+                    async with asyncio.timeout(settings.OUTBOUND_SEND_TIMEOUT):
+                        if self.binary:
+                            await connection.send_bytes(data)
+                        else:
+                            await connection.send_text(data)
+                except TimeoutError:
+                    logger.warning(
+                        'Websocket send timed out, disconnecting websocket, connection_id: %s',
+                        self.connection_id
+                    )
+                    self.writer = None
+                    self.__overflow()
+                    return
+                except (WebSocketDisconnect, RuntimeError):
+                    logger.warning('Cannot send message to closing websocket, connection_id: %s', self.connection_id)
+                    continue
+                if message_type is not None:
+                    ws_send_duration.labels(message_type).observe(perf_counter_ns() - queued)
+                if sample_debug(logger):
+                    logger.debug('Message sent to websocket', extra={'connection_id': self.connection_id, 'data': data})
+
+    async def __close(self) -> None:
+        try:
+            async with asyncio.timeout(settings.OUTBOUND_SEND_TIMEOUT):
+                await self.websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except (TimeoutError, WebSocketDisconnect, RuntimeError):
+            logger.warning('Cannot close overflowed websocket, connection_id: %s', self.connection_id)
@@ -0,0 +1,67 @@
+from collections import Counter
+
+from api.config import settings
+from api.session.schemas import PlayerPlacement
+
+GRID_SIZE_X = settings.GRID_SIZE_X
+GRID_SIZE_Y = settings.GRID_SIZE_Y
+GRID_SIZE = GRID_SIZE_X * GRID_SIZE_Y
+
+FLEET = Counter(int(size) for size in settings.FLEET.split(','))
+
+HORIZONTAL = 0
+VERTICAL = 1
+DIRECTION_STEPS = {HORIZONTAL: 1, VERTICAL: GRID_SIZE_X}
+
+INNER_NEIGHBOURS = tuple(
+    row * GRID_SIZE_X + column
+    for row in (-1, 0, 1) for column in (-1, 0, 1)
+)
+FIRST_COLUMN_NEIGHBOURS = tuple(offset for offset in INNER_NEIGHBOURS if (offset + 1) % GRID_SIZE_X != 0)
+LAST_COLUMN_NEIGHBOURS = tuple(offset for offset in INNER_NEIGHBOURS if (offset - 1) % GRID_SIZE_X != 0)
+
+
+def neighbour_offsets(cell: int) -> tuple[int, ...]:
+    column = cell % GRID_SIZE_X
+    if column == 0:
+        return FIRST_COLUMN_NEIGHBOURS
+    if column == GRID_SIZE_X - 1:
+        return LAST_COLUMN_NEIGHBOURS
+    return INNER_NEIGHBOURS
+
+
+def validate_placement(placement: PlayerPlacement) -> str | None:
+    if not placement.entities:
+        return 'placement has no entities'
+    if Counter(entity.size for entity in placement.entities.values()) != FLEET:
+        return 'entities do not match the configured fleet'
+    if placement.board is not None and len(placement.board) != GRID_SIZE:
+        return 'board length does not match grid size'
+
+    occupied: set[int] = set()
+    for entity_id, entity in placement.entities.items():
+        cells = sorted(entity.cells)
+        if not cells or len(cells) != entity.size:
+            return f'entity {entity_id} size does not match its cells'
+        if cells[0] < 0 or cells[-1] >= GRID_SIZE:
+            return f'entity {entity_id} is out of the grid'
+
+        step = DIRECTION_STEPS.get(entity.direction)
+        if step is None:
+            return f'entity {entity_id} has unknown direction'
+        if cells != list(range(cells[0], cells[0] + step * len(cells), step)):
+            return f'entity {entity_id} cells are not contiguous'
+        if entity.direction == HORIZONTAL and cells[0] // GRID_SIZE_X != cells[-1] // GRID_SIZE_X:
+            return f'entity {entity_id} wraps around the grid'
+
+        if not occupied.isdisjoint(cells):
+            return f'entity {entity_id} overlaps another entity'
+        halo = {cell + offset for cell in cells for offset in neighbour_offsets(cell)}
+        if not occupied.isdisjoint(halo):
+            return f'entity {entity_id} touches another entity'
+        occupied.update(cells)
+
+    if placement.board is not None:
+        if placement.board.count('1') != len(occupied) or any(placement.board[cell] != '1' for cell in occupied):
+            return 'board does not match entity cells'
+    return None
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from uuid import UUID
+
+import orjson
+
+from api.config import settings
+from api.services import transaction
+from api.session import redis_services
+from api.session import services
+from api.session.backplane import backplane
+from api.session.lobby_manager import lobby
+from api.session.websocket_manager import manager
+
+logger = logging.getLogger(__name__)
+
+REAPER_CHANNEL = 'reaper:sessions'
+
+
+class SessionReaper:
+    def __init__(self, interval: int, batch_size: int, idle_ttl: int, max_age: int) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self.idle_ttl = idle_ttl
+        self.max_age = max_age
+        self.task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        await backplane.subscribe(REAPER_CHANNEL, self.__release)
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if await redis_services.acquire_reaper_lock(self.interval):
+                    await self.sweep()
+            except Exception:
+                logger.exception('Session reaper sweep failed')
+
+    async def sweep(self) -> tuple[int, int, int]:
+        reclaimed_sessions = reclaimed_players = reclaimed_keys = 0
+        while True:
+            candidates = await services.get_expired_sessions(self.idle_ttl, self.max_age, self.batch_size)
+            if not candidates:
+                break
+
+            candidate_ids = [candidate.id for candidate in candidates]
+            live = await redis_services.get_live_sessions(candidate_ids)
+            live |= await self.__connected_sessions(candidate_ids)
+            touched = [candidate.id for candidate in candidates if candidate.id in live and not candidate.is_too_old]
+            expired = [candidate.id for candidate in candidates if candidate.id not in live or candidate.is_too_old]
+            if touched:
+                await services.touch_sessions(touched)
+
+            if expired:
+                async with transaction():
+                    players = await services.delete_session_players(expired)
+                    sessions = await services.delete_sessions(expired)
+                reclaimed_players += len(players)
+                reclaimed_sessions += len(sessions)
+                reclaimed_keys += await redis_services.delete_sessions(expired)
+                await backplane.publish(REAPER_CHANNEL, orjson.dumps({
+                    'sessions': [str(expired_session.id) for expired_session in sessions],
+                    'players': [str(expired_player.id) for expired_player in players],
+                }).decode('utf-8'))
+                for expired_session in sessions:
+                    await lobby.send_session_removed_message(expired_session.id)
+
+            if len(candidates) < self.batch_size:
+                break
+
+        logger.info(
+            'Session reaper sweep finished, sessions: %s, players: %s, redis keys: %s',
+            reclaimed_sessions, reclaimed_players, reclaimed_keys
+        )
+        return reclaimed_sessions, reclaimed_players, reclaimed_keys
+
+    @staticmethod
+    async def __connected_sessions(session_ids: list[UUID]) -> set[UUID]:
+        players = await services.get_session_players(session_ids)
+        if not players:
+            return set()
+        connected = await manager.get_connected_players([session_player.id for session_player in players])
+        return {session_player.session_id for session_player in players if session_player.id in connected}
+
+    @staticmethod
+    async def __release(message: dict) -> None:
+        released = orjson.loads(message['data'])
+        await manager.release_sessions(
+            [UUID(session_id) for session_id in released['sessions']],
+            [UUID(player_id) for player_id in released['players']]
+        )
+
+
+reaper = SessionReaper(
+    settings.REAPER_INTERVAL,
+    settings.REAPER_BATCH_SIZE,
+    settings.SESSION_IDLE_TTL,
+    settings.SESSION_MAX_AGE
+)
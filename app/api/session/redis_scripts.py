@@ -0,0 +1,97 @@
+RESOLVE_HIT = """
+local prefix = 'player:' .. ARGV[2]
+
+if redis.call('HGET', KEYS[1], 'turn') ~= ARGV[1] then
+    for _, player_id in ipairs({ARGV[1], ARGV[2]}) do
+        local remaining = tonumber(redis.call('HGET', KEYS[1], 'player:' .. player_id .. ':remaining'))
+        if remaining ~= nil and remaining <= 0 then
+            return {'finished', ''}
+        end
+    end
+    return {'not_turn', ''}
+end
+
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+if redis.call('SADD', KEYS[2], ARGV[3]) == 0 then
+    return {'repeat', ''}
+end
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+redis.call('HINCRBY', KEYS[1], 'version', 1)
+
+local entity_id = redis.call('HGET', KEYS[1], prefix .. ':cell:' .. ARGV[3])
+if not entity_id then
+    redis.call('HSET', KEYS[1], 'turn', ARGV[2])
+    return {'miss', ''}
+end
+
+if redis.call('HINCRBY', KEYS[1], prefix .. ':remaining', -1) <= 0 then
+    redis.call('HDEL', KEYS[1], 'turn')
+    return {'win', entity_id}
+end
+
+local entity_prefix = prefix .. ':entity:' .. entity_id
+local entity_hits = redis.call('HINCRBY', KEYS[1], entity_prefix .. ':hits', 1)
+local entity_size = tonumber(redis.call('HGET', KEYS[1], entity_prefix .. ':size'))
+if entity_size ~= nil and entity_hits >= entity_size then
+    return {'destroy', entity_id}
+end
+return {'hit', entity_id}
+"""
+
+SAVE_GAME_CHANGES = """
+if tonumber(redis.call('HGET', KEYS[1], 'version') or '0') ~= tonumber(ARGV[1]) then
+    return 0
+end
+
+local fields_end = 4 + 2 * tonumber(ARGV[4])
+local index = fields_end + 1
+for key = 2, #KEYS do
+    local count = tonumber(ARGV[index])
+    redis.call('SADD', KEYS[key], unpack(ARGV, index + 1, index + count))
+    redis.call('EXPIRE', KEYS[key], ARGV[3])
+    index = index + count + 1
+end
+
+if fields_end > 4 then
+    redis.call('HSET', KEYS[1], unpack(ARGV, 5, fields_end))
+end
+if ARGV[2] == '' then
+    redis.call('HDEL', KEYS[1], 'turn')
+else
+    redis.call('HSET', KEYS[1], 'turn', ARGV[2])
+end
+redis.call('HSET', KEYS[1], 'version', tonumber(ARGV[1]) + 1)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+DELETE_SESSION = """
+local keys = {KEYS[1]}
+for _, field in ipairs(redis.call('HKEYS', KEYS[1])) do
+    local player_id = string.match(field, '^player:(.+):remaining$')
+    if player_id then
+        table.insert(keys, KEYS[1] .. ':player:' .. player_id .. ':hits')
+    end
+end
+return redis.call('DEL', unpack(keys))
+"""
+
+CLEAR_PLACEMENT = """
+local cell_prefix = 'player:' .. ARGV[1] .. ':cell:'
+local entity_prefix = 'player:' .. ARGV[1] .. ':entity:'
+local fields = {}
+local deleted = 0
+for _, field in ipairs(redis.call('HKEYS', KEYS[1])) do
+    if string.sub(field, 1, #cell_prefix) == cell_prefix or string.sub(field, 1, #entity_prefix) == entity_prefix then
+        table.insert(fields, field)
+        if #fields == 1000 then
+            deleted = deleted + redis.call('HDEL', KEYS[1], unpack(fields))
+            fields = {}
+        end
+    end
+end
+if #fields > 0 then
+    deleted = deleted + redis.call('HDEL', KEYS[1], unpack(fields))
+end
+return deleted
+"""
@@ -1,116 +1,257 @@
+from typing import Literal
 from uuid import UUID
 
-import redis.asyncio as redis
-
 from api.config import settings
+from api.database import redis_client
+from api.metrics import redis_duration, timed
+from api.session.redis_scripts import RESOLVE_HIT, SAVE_GAME_CHANGES, DELETE_SESSION, CLEAR_PLACEMENT
 from api.session.schemas import EntityData
 
-REDIS_URL = f'redis://redis:{settings.REDIS_PORT}'
+resolve_hit_script = redis_client.register_script(RESOLVE_HIT)
+save_game_changes_script = redis_client.register_script(SAVE_GAME_CHANGES)
+delete_session_script = redis_client.register_script(DELETE_SESSION)
+clear_placement_script = redis_client.register_script(CLEAR_PLACEMENT)
+
+
+def session_key(session_id: UUID) -> str:
+    return f'session:{session_id}'
+
+
+def hits_key(session_id: UUID, player_id: UUID) -> str:
+    return f'session:{session_id}:player:{player_id}:hits'
+
+
+REAPER_LOCK_KEY = 'reaper:lock'
 
 
+def lobby_page_field(limit: int, cursor: str | None, name: str | None) -> str:
+    return f'{limit}:{cursor or ""}:{name or ""}'
+
+
+async def load_scripts() -> None:
+    for script in (resolve_hit_script, save_game_changes_script, delete_session_script, clear_placement_script):
+        await redis_client.script_load(script.script)
+
+
+@timed(redis_duration)
 async def set_player_data(
         session_id: UUID,
         player_id: UUID,
-        board: str,
         entities: dict[UUID, EntityData]
 ) -> None:
-    client = redis.from_url(REDIS_URL)
-
-    await client.hset(
-        f'session:{session_id}',
-        f'player:{player_id}:board',
-        board
-    )
-    await client.hset(
-        f'session:{session_id}',
-        f'player:{player_id}:hits',
-        '0' * settings.GRID_SIZE_X * settings.GRID_SIZE_Y
-    )
-
+    mapping = {
+        f'player:{player_id}:remaining': sum(len(entity_data.cells) for entity_data in entities.values()),
+    }
     for entity_id, entity_data in entities.items():
-        await client.hset(
-            f'session:{session_id}',
-            f'player:{player_id}:entity:{entity_id}:hits',
-            0
-        )
-        await client.hset(
-            f'session:{session_id}',
-            f'player:{player_id}:entity:{entity_id}:size',
-            entity_data.size
-        )
-        await client.hset(
-            f'session:{session_id}',
-            f'player:{player_id}:entity:{entity_id}:direction',
-            entity_data.direction
-        )
-        await client.hset(
-            f'session:{session_id}',
-            f'player:{player_id}:entity:{entity_id}:cells',
-            ' '.join(str(cell) for cell in entity_data.cells)
+        mapping[f'player:{player_id}:entity:{entity_id}:hits'] = 0
+        mapping[f'player:{player_id}:entity:{entity_id}:size'] = entity_data.size
+        mapping[f'player:{player_id}:entity:{entity_id}:direction'] = entity_data.direction
+        mapping[f'player:{player_id}:entity:{entity_id}:cells'] = ' '.join(
+            str(cell) for cell in entity_data.cells
         )
+        for cell in entity_data.cells:
+            mapping[f'player:{player_id}:cell:{cell}'] = str(entity_id)
 
-    await client.close()
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(hits_key(session_id, player_id))
+        await clear_placement_script(keys=[session_key(session_id)], args=[str(player_id)], client=pipe)
+        pipe.hset(session_key(session_id), mapping=mapping)
+        pipe.expire(session_key(session_id), settings.SESSION_IDLE_TTL)
+        await pipe.execute()
 
 
-async def get_player_board(session_id: UUID, player_id: UUID) -> str:
-    client = redis.from_url(REDIS_URL)
-    board = await client.hget(
-        f'session:{session_id}',
-        f'player:{player_id}:board'
+@timed(redis_duration)
+async def resolve_hit(
+        session_id: UUID,
+        player_id: UUID,
+        enemy_id: UUID,
+        cell: int
+) -> tuple[Literal['miss', 'hit', 'destroy', 'win', 'repeat', 'not_turn', 'finished'], str]:
+    status, entity_id = await resolve_hit_script(
+        keys=[
+            session_key(session_id),
+            hits_key(session_id, enemy_id)
+        ],
+        args=[str(player_id), str(enemy_id), cell, settings.SESSION_IDLE_TTL]
     )
-    await client.close()
-    return board.decode('utf-8')
+    return status.decode('utf-8'), entity_id.decode('utf-8')
 
 
-async def get_entity_size(session_id: UUID, player_id: UUID, entity_id: str) -> int:
-    client = redis.from_url(REDIS_URL)
-    size = await client.hget(
-        f'session:{session_id}',
-        f'player:{player_id}:entity:{entity_id}:size'
-    )
-    await client.close()
-    return int(size.decode('utf-8'))
+@timed(redis_duration)
+async def save_game_changes(
+        changes: list[tuple[UUID, UUID | None, int, list[tuple[UUID, list[int], int, dict[str, int]]]]]
+) -> list[bool]:
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for session_id, turn, version, players in changes:
+            keys = [session_key(session_id)]
+            fields = []
+            hits = []
+            for player_id, cells, remaining, entity_hits in players:
+                if cells:
+                    keys.append(hits_key(session_id, player_id))
+                    hits.append(len(cells))
+                    hits.extend(cells)
+                fields.extend((f'player:{player_id}:remaining', remaining))
+                for entity_id, entity_hit_count in entity_hits.items():
+                    fields.extend((f'player:{player_id}:entity:{entity_id}:hits', entity_hit_count))
+            args = [version, '' if turn is None else str(turn), settings.SESSION_IDLE_TTL, len(fields) // 2]
+            await save_game_changes_script(keys=keys, args=args + fields + hits, client=pipe)
+        return [bool(saved) for saved in await pipe.execute()]
 
 
-async def add_player_hits(session_id: UUID, player_id: UUID, cell: int) -> str:
-    client = redis.from_url(REDIS_URL)
-    hits = await client.hget(
-        f'session:{session_id}',
-        f'player:{player_id}:hits'
-    )
-    hits_str = str(hits.decode('utf-8'))
-    new_hits = hits_str[0:cell] + '1' + hits_str[cell+1:]
-    await client.hset(
-        f'session:{session_id}',
-        f'player:{player_id}:hits',
-        new_hits
+@timed(redis_duration)
+async def set_turn(session_id: UUID, player_id: UUID) -> None:
+    await redis_client.hset(session_key(session_id), 'turn', str(player_id))
+
+
+@timed(redis_duration)
+async def set_enemy_joined(session_id: UUID, player_id: UUID, enemy_id: UUID) -> None:
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hset(session_key(session_id), mapping={
+            f'player:{player_id}:enemy_joined': 1,
+            f'player:{enemy_id}:enemy_joined': 1,
+        })
+        pipe.expire(session_key(session_id), settings.SESSION_IDLE_TTL)
+        await pipe.execute()
+
+
+@timed(redis_duration)
+async def get_enemy_joined(session_id: UUID, player_id: UUID) -> bool:
+    enemy_joined = await redis_client.hget(
+        session_key(session_id),
+        f'player:{player_id}:enemy_joined'
     )
-    await client.close()
-    return new_hits
+    return enemy_joined == b'1'
 
 
-async def add_entity_hits(
+@timed(redis_duration)
+async def set_player_ready(
         session_id: UUID,
         player_id: UUID,
-        entity_id: str,
-        count: int
-) -> int:
-    client = redis.from_url(REDIS_URL)
-    hits = await client.hget(
-        f'session:{session_id}',
-        f'player:{player_id}:entity:{entity_id}:hits'
-    )
-    new_hits = int(hits.decode('utf-8')) + count
-    await client.hset(
-        f'session:{session_id}',
-        f'player:{player_id}:entity:{entity_id}:hits',
-        new_hits
+        enemy_id: UUID,
+        is_ready: bool
+) -> bool:
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(session_key(session_id), f'player:{player_id}:is_ready', int(is_ready))
+        pipe.hget(session_key(session_id), f'player:{enemy_id}:is_ready')
+        _, enemy_is_ready = await pipe.execute()
+    return enemy_is_ready == b'1'
+
+
+@timed(redis_duration)
+async def get_player_ready(session_id: UUID, player_id: UUID) -> bool:
+    is_ready = await redis_client.hget(
+        session_key(session_id),
+        f'player:{player_id}:is_ready'
     )
-    await client.close()
-    return new_hits
+    return is_ready == b'1'
+
+
+@timed(redis_duration)
+async def set_player_in_game(session_id: UUID, player_id: UUID) -> None:
+    await redis_client.hset(session_key(session_id), f'player:{player_id}:in_game', 1)
 
 
+def parse_entities(fields: dict[str, str], player_id: UUID) -> dict[str, dict]:
+    entities = {}
+    prefix = f'player:{player_id}:entity:'
+    for field, value in fields.items():
+        if not field.startswith(prefix):
+            continue
+        entity_id, name = field[len(prefix):].rsplit(':', 1)
+        entity = entities.setdefault(entity_id, {})
+        if name == 'cells':
+            entity['cells'] = [int(cell) for cell in value.split()]
+        else:
+            entity[name] = int(value)
+    return entities
+
+
+@timed(redis_duration)
+async def get_game_snapshot(session_id: UUID, player_id: UUID, enemy_id: UUID) -> dict | None:
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hgetall(session_key(session_id))
+        pipe.smembers(hits_key(session_id, enemy_id))
+        pipe.smembers(hits_key(session_id, player_id))
+        raw_fields, player_hits, enemy_hits = await pipe.execute()
+
+    fields = {field.decode('utf-8'): value.decode('utf-8') for field, value in raw_fields.items()}
+    if f'player:{player_id}:in_game' not in fields:
+        return None
+    won = int(fields.get(f'player:{enemy_id}:remaining', 1)) <= 0
+    lost = int(fields.get(f'player:{player_id}:remaining', 1)) <= 0
+    return {
+        'yourTurn': fields.get('turn') == str(player_id),
+        'finished': won or lost,
+        'won': won,
+        'entities': parse_entities(fields, player_id),
+        'enemyEntities': parse_entities(fields, enemy_id),
+        'playerHits': sorted(int(cell) for cell in player_hits),
+        'enemyHits': sorted(int(cell) for cell in enemy_hits),
+    }
+
+
+@timed(redis_duration)
 async def delete_session(session_id: UUID) -> None:
-    client = redis.from_url(REDIS_URL)
-    await client.delete(f'session:{session_id}')
-    await client.close()
+    await delete_session_script(keys=[session_key(session_id)])
+
+
+@timed(redis_duration)
+async def delete_sessions(session_ids: list[UUID]) -> int:
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for session_id in session_ids:
+            await delete_session_script(keys=[session_key(session_id)], client=pipe)
+        return sum(await pipe.execute())
+
+
+@timed(redis_duration)
+async def get_live_sessions(session_ids: list[UUID]) -> set[UUID]:
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for session_id in session_ids:
+            pipe.exists(session_key(session_id))
+        exists = await pipe.execute()
+    return {session_id for session_id, is_live in zip(session_ids, exists) if is_live}
+
+
+@timed(redis_duration)
+async def acquire_reaper_lock(ttl: int) -> bool:
+    return bool(await redis_client.set(REAPER_LOCK_KEY, 1, nx=True, ex=ttl))
+
+
+@timed(redis_duration)
+async def get_lobby_page(
+        limit: int,
+        cursor: str | None,
+        name: str | None
+) -> tuple[bytes, str | None] | None:
+    field = lobby_page_field(limit, cursor, name)
+    body, next_cursor = await redis_client.hmget('lobby', f'{field}:body', f'{field}:cursor')
+    if body is None:
+        return None
+    return body, next_cursor.decode('utf-8') or None
+
+
+@timed(redis_duration)
+async def set_lobby_page(
+        limit: int,
+        cursor: str | None,
+        name: str | None,
+        body: bytes,
+        next_cursor: str | None
+) -> None:
+    field = lobby_page_field(limit, cursor, name)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hset('lobby', mapping={
+            f'{field}:body': body,
+            f'{field}:cursor': next_cursor or '',
+        })
+        pipe.expire('lobby', settings.LOBBY_CACHE_TTL)
+        await pipe.execute()
+
+
+@timed(redis_duration)
+async def publish_lobby_change(channel: str, data: str) -> None:
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.delete('lobby')
+        pipe.publish(channel, data)
+        await pipe.execute()
@@ -1,30 +1,40 @@
+import binascii
 import logging
+from functools import partial
 from uuid import UUID
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Response
 from fastapi import WebSocket
 from starlette.websockets import WebSocketDisconnect
 
+from api.config import settings
+from api.profiler import profiler
+from api.services import transaction
 from api.session import redis_services
 from api.session import services
+from api.session.game_state import writer
 from api.session.exceptions import (
     WsPlayerNotFound,
     WsSessionNotFound,
     HttpSessionNotFound,
     HttpInvalidPassword,
     HttpSessionAlreadyExists,
-    HttpSessionAlreadyFull
+    HttpSessionAlreadyFull,
+    HttpInvalidCursor
 )
 from api.session.schemas import (
     SessionCreate,
     PlayerIDResponse,
     Session,
     SessionLogin,
-    Entities
+    Entities,
+    sessions_adapter
 )
-from api.session.utils import validate_password
+from api.session.lobby_manager import lobby
+from api.session.utils import validate_password, encode_cursor, decode_cursor
 from api.session.websocket_manager import manager
 from api.session.websocket_utils import (
+    ws_receive_message,
     ws_receive_player_placement_ready_message
 )
 
@@ -37,25 +47,52 @@ router = APIRouter(
 
 
 @router.get('', response_model=list[Session])
-async def get_sessions():
-    sessions = await services.get_sessions(is_ready=False, desc_sort=True)
-    return sessions
+async def get_sessions(
+        limit: int = Query(settings.LOBBY_PAGE_SIZE, ge=1, le=settings.LOBBY_MAX_PAGE_SIZE),
+        cursor: str | None = None,
+        name: str | None = None
+):
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise HttpInvalidCursor
+
+    page = await redis_services.get_lobby_page(limit, cursor, name)
+    if page is not None:
+        body, next_cursor = page
+    else:
+        sessions = await services.get_sessions(
+            is_ready=False,
+            desc_sort=True,
+            name_prefix=name,
+            after=after,
+            limit=limit + 1
+        )
+        next_cursor = None
+        if len(sessions) > limit:
+            sessions = sessions[:limit]
+            next_cursor = encode_cursor(sessions[-1].created_at, sessions[-1].id)
+        body = sessions_adapter.dump_json(sessions_adapter.validate_python(sessions), by_alias=True)
+        await redis_services.set_lobby_page(limit, cursor, name, body, next_cursor)
+
+    headers = {'X-Next-Cursor': next_cursor} if next_cursor is not None else None
+    return Response(content=body, media_type='application/json', headers=headers)
 
 
 @router.post('/create', response_model=PlayerIDResponse)
 async def create_session(session_request: SessionCreate):
-    session = await services.get_session(name=session_request.name)
-    if session is not None:
-        logger.warning('Session already exists, session_name: %s', session_request.name)
-        raise HttpSessionAlreadyExists
-
-    session = await services.create_session(
+    player = await services.create_session(
         name=session_request.name,
         password=session_request.password
     )
-    logger.debug('Session created in database, session_id: %s', session.id)
-    player = await services.create_player(session.id)
-    logger.debug('Player created in database, session_id: %s', player.id)
+    if player is None:
+        logger.warning('Session already exists, session_name: %s', session_request.name)
+        raise HttpSessionAlreadyExists
+
+    logger.debug('Session and player created in database, session_id: %s, player_id: %s', player.session_id, player.id)
+    await lobby.send_session_added_message(player.session_id, session_request.name)
     return PlayerIDResponse(player_id=player.id)
 
 
@@ -70,61 +107,98 @@ async def login_session(session_request: SessionLogin):
         raise HttpSessionAlreadyFull
 
     correct_password = session.password
-    if not validate_password(session_request.password, correct_password):
+    if not await validate_password(session_request.password, correct_password):
         logger.info('Session login failed, session_id: %s', session.id)
         raise HttpInvalidPassword
 
-    player = await services.create_player(session.id)
-    logger.debug('Player created in database, player_id: %s', player.id)
+    player = await services.join_session(session.id)
+    if player is None:
+        logger.info('Session filled concurrently, session_id: %s', session.id)
+        raise HttpSessionAlreadyFull
 
-    if not session.is_ready:
-        await services.update_session(session.id, is_ready=True)
-        logger.debug('Session updated (is_ready=True) in database, session_id: %s', session.id)
+    logger.debug('Player created and session filled in database, session_id: %s, player_id: %s', session.id, player.id)
+    await lobby.send_session_filled_message(session.id)
     return PlayerIDResponse(player_id=player.id)
 
 
+@router.websocket('/lobby/ws')
+async def websocket_connect_lobby(websocket: WebSocket):
+    await lobby.connect(websocket)
+    try:
+        while True:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+    finally:
+        lobby.disconnect(websocket)
+
+
 @router.websocket('/ws')
 async def websocket_connect_player(websocket: WebSocket, player_id: UUID):
-    player = await services.get_player(player_id)
-    if player is None:
+    context = await services.get_player_context(player_id)
+    if context is None:
         logger.warning('Player not found in database, player_id: %s', player_id)
         raise WsPlayerNotFound
 
-    session = await services.get_session(player.session_id)
-    if session is None:
+    session_id = context.session_id
+    if session_id is None:
         logger.warning('Session not found in database, player_id: %s', player_id)
         raise WsSessionNotFound
 
     await manager.connect(websocket, player_id)
+    profiler.begin(player_id, session_id)
+    in_game = False
     try:
-        await manager.login_session(websocket, session_id=session.id, player_id=player.id)
-        enemy = await services.get_enemy(player_id, session.id)
+        enemy_id = context.enemy_id
+        snapshot = None
+        if enemy_id is not None:
+            snapshot = await manager.resume_game(session_id, player_id, enemy_id)
+        if snapshot is None:
+            await manager.login_session(websocket, session_id=session_id, player_id=player_id, enemy_id=enemy_id)
+            if enemy_id is None:
+                enemy_id = (await services.get_player_context(player_id)).enemy_id
+            while True:
+                placement = await ws_receive_player_placement_ready_message(websocket)
+                await manager.add_player_placement(session_id, player_id, placement)
+                start = await manager.start_game(websocket, session_id, player_id, enemy_id)
+                if start:
+                    break
+            await manager.send_player_entities_message(enemy_id, Entities(entities=placement.entities))
+        in_game = snapshot is None or not snapshot['finished']
+        while in_game:
+            in_game = not await manager.handle_hit(websocket, session_id, player_id, enemy_id)
         while True:
-            placement = await ws_receive_player_placement_ready_message(websocket)
-            start = await manager.start_game(websocket, player_id, enemy.id)
-            if start:
-                break
-        await redis_services.set_player_data(
-            session.id, player_id, placement.board, placement.entities
-        )
-        logger.debug('Player placement added to redis, session_id: %s, player_id: %s', session.id, player_id)
-        await manager.send_player_entities_message(enemy.id, Entities(entities=placement.entities))
-        while True:
-            await manager.handle_hit(websocket, session.id, player_id, enemy.id)
-
-    except WebSocketDisconnect:
-        await manager.disconnect(player.id)
-
-        await services.delete_player(player.id)
-        logger.debug('Player deleted from database, player_id: %s', player.id)
-
-        enemy = await services.get_enemy(player_id=player.id, session_id=session.id)
-        if enemy is not None:
-            await manager.send_enemy_left_message(to_id=enemy.id)
+            await ws_receive_message(websocket)
+
+    except WebSocketDisconnect as exc:
+        if not await manager.disconnect(player_id, websocket, exc.code):
+            return
+        manager.leave_game(session_id, player_id)
+        if in_game and settings.RECONNECT_GRACE > 0:
+            await writer.flush()
+            manager.schedule_removal(
+                player_id, settings.RECONNECT_GRACE, partial(remove_player, session_id, player_id)
+            )
         else:
-            session = await services.get_session(uuid=player.session_id)
-            if session is not None:
-                await services.delete_session(session.id)
-                logger.debug('Session deleted from database, session_id: %s', session.id)
-                await redis_services.delete_session(session.id)
-                logger.debug('Session deleted from redis, session_id: %s', session.id)
+            await remove_player(session_id, player_id)
+
+
+async def remove_player(session_id: UUID, player_id: UUID) -> None:
+    deleted_session = None
+    async with transaction():
+        await services.delete_player(player_id)
+        logger.debug('Player deleted from database, player_id: %s', player_id)
+
+        enemy = await services.get_enemy(player_id=player_id, session_id=session_id)
+        if enemy is None:
+            deleted_session = await services.delete_session(session_id)
+            if deleted_session is not None:
+                logger.debug('Session deleted from database, session_id: %s', session_id)
+
+    if enemy is not None:
+        await manager.send_enemy_left_message(to_id=enemy.id)
+    elif deleted_session is not None:
+        manager.end_game(session_id)
+        await redis_services.delete_session(session_id)
+        logger.debug('Session deleted from redis, session_id: %s', session_id)
+        await lobby.send_session_removed_message(session_id)
@@ -1,13 +1,14 @@
-from typing import Literal
+from typing import Annotated, Literal, Union
 from uuid import UUID
 
-from pydantic import field_validator
+from pydantic import field_validator, Field, TypeAdapter
 
 from api.schemas import BaseSchema
 from api.session.exceptions import (
     HttpInvalidNameLength,
     HttpInvalidPasswordLength
 )
+from api.session.websocket_response_types import WsResponseType
 
 
 class Session(BaseSchema):
@@ -15,6 +16,9 @@ class Session(BaseSchema):
     name: str
 
 
+sessions_adapter = TypeAdapter(list[Session])
+
+
 class SessionCreate(BaseSchema):
     name: str
     password: str
@@ -40,11 +44,6 @@ class PlayerIDResponse(BaseSchema):
     player_id: UUID
 
 
-class WsMessageModel(BaseSchema):
-    type: str
-    detail: dict
-
-
 class EntityCells(BaseSchema):
     cells: list[int]
 
@@ -66,13 +65,52 @@ class Entities(BaseSchema):
 
 
 class PlayerPlacement(Entities):
-    board: str
+    board: str | None = Field(default=None, pattern='^[01]+$')
 
 
 class Hit(BaseSchema):
     cell: int
-    entity_id: str
+    entity_id: str = ''
 
 
 class HitResponse(Hit):
     status: Literal['hit', 'miss', 'destroy']
+
+
+class PlayerStartSessionMessage(BaseSchema):
+    type: Literal[WsResponseType.PLAYER_START_SESSION]
+    detail: dict
+
+
+class PlayerPlacementReadyMessage(BaseSchema):
+    type: Literal[WsResponseType.PLAYER_PLACEMENT_READY]
+    detail: PlayerPlacement
+
+
+class PlayerPlacementNotReadyMessage(BaseSchema):
+    type: Literal[WsResponseType.PLAYER_PLACEMENT_NOT_READY]
+    detail: dict
+
+
+class PlayerStartGameMessage(BaseSchema):
+    type: Literal[WsResponseType.PLAYER_START_GAME]
+    detail: dict
+
+
+class HitMessage(BaseSchema):
+    type: Literal[WsResponseType.HIT]
+    detail: Hit
+
+
+WsMessage = Annotated[
+    Union[
+        PlayerStartSessionMessage,
+        PlayerPlacementReadyMessage,
+        PlayerPlacementNotReadyMessage,
+        PlayerStartGameMessage,
+        HitMessage,
+    ],
+    Field(discriminator='type')
+]
+
+ws_message_adapter = TypeAdapter(WsMessage)
@@ -1,33 +1,77 @@
 import logging
+from datetime import datetime, timedelta
+from functools import partial
+from typing import NamedTuple
 from uuid import UUID
 
-from sqlalchemy import select, insert, delete, desc, update
+from sqlalchemy import select, delete, desc, update, tuple_, and_, or_, func
+from sqlalchemy.dialects.postgresql import insert
 
-from api.services import execute_query
+from api.cache import TTLCache
+from api.config import settings
+from api.services import after_commit, execute_query
+from api.session.backplane import backplane
 from api.session.models import session, player
 from api.session.utils import hash_password
 
 logger = logging.getLogger(__name__)
 
+PLAYER_CACHE_CHANNEL = 'cache:players'
 
-async def create_session(name: str, password: str) -> session:
-    hashed_password = hash_password(password)
-    query = insert(session).values([{
+player_context_cache = TTLCache(settings.PLAYER_CACHE_SIZE, settings.PLAYER_CACHE_TTL)
+
+
+class PlayerContext(NamedTuple):
+    player_id: UUID
+    session_id: UUID | None
+    enemy_id: UUID | None
+
+
+async def create_session(name: str, password: str) -> player:
+    hashed_password = await hash_password(password)
+    new_session = insert(session).values([{
         'name': name,
         'password': hashed_password,
-    }]).returning(session)
+    }]).on_conflict_do_nothing(
+        index_elements=[session.c.name]
+    ).returning(session.c.id).cte('new_session')
+    query = insert(player).add_cte(new_session).from_select(
+        ['session_id'], select(new_session.c.id)
+    ).returning(player)
+    return await execute_query(query, commit=True)
+
+
+async def join_session(uuid: UUID) -> player:
+    filled_session = update(session).where(
+        session.c.id == uuid,
+        session.c.is_ready.is_(False)
+    ).values(is_ready=True, last_activity=func.now()).returning(session.c.id).cte('filled_session')
+    query = insert(player).add_cte(filled_session).from_select(
+        ['session_id'], select(filled_session.c.id)
+    ).returning(player)
     return await execute_query(query, commit=True)
 
 
 async def get_sessions(
         is_ready: bool | None = None,
-        desc_sort: bool = False
-) -> session:
+        desc_sort: bool = False,
+        name_prefix: str | None = None,
+        after: tuple[datetime, UUID] | None = None,
+        limit: int | None = None
+) -> list[session]:
     query = select(session)
     if is_ready is not None:
         query = query.where(session.c.is_ready == is_ready)
+    if name_prefix is not None:
+        query = query.where(session.c.name.startswith(name_prefix, autoescape=True))
     if desc_sort is True:
-        query = query.order_by(desc(session.c.created_at))
+        if after is not None:
+            query = query.where(tuple_(session.c.created_at, session.c.id) < after)
+        query = query.order_by(desc(session.c.created_at), desc(session.c.id))
+    elif after is not None:
+        query = query.where(tuple_(session.c.created_at, session.c.id) > after)
+    if limit is not None:
+        query = query.limit(limit)
     return await execute_query(query, first_only=False)
 
 
@@ -64,11 +108,33 @@ async def update_session(
     return await execute_query(query, commit=True)
 
 
-async def delete_session(uuid: UUID) -> None:
-    query = delete(session).where(session.c.id == uuid)
+async def delete_session(uuid: UUID) -> session:
+    query = delete(session).where(session.c.id == uuid).returning(session.c.id)
+    return await execute_query(query, commit=True)
+
+
+async def get_expired_sessions(idle_ttl: int, max_age: int, limit: int) -> list[session]:
+    max_age_cutoff = func.now() - timedelta(seconds=max_age)
+    query = select(
+        session.c.id,
+        (session.c.created_at < max_age_cutoff).label('is_too_old'),
+    ).where(or_(
+        session.c.last_activity < func.now() - timedelta(seconds=idle_ttl),
+        session.c.created_at < max_age_cutoff,
+    )).limit(limit)
+    return await execute_query(query, first_only=False)
+
+
+async def touch_sessions(uuids: list[UUID]) -> None:
+    query = update(session).where(session.c.id.in_(uuids)).values(last_activity=func.now())
     await execute_query(query, commit=True, return_result=False)
 
 
+async def delete_sessions(uuids: list[UUID]) -> list[session]:
+    query = delete(session).where(session.c.id.in_(uuids)).returning(session.c.id)
+    return await execute_query(query, commit=True, first_only=False)
+
+
 async def create_player(session_id: UUID) -> player:
     query = insert(player).values([{
         'session_id': session_id,
@@ -78,7 +144,7 @@ async def create_player(session_id: UUID) -> player:
 
 async def get_player(uuid: UUID) -> player:
     query = select(player).where(player.c.id == uuid)
-    return await execute_query(query, commit=True)
+    return await execute_query(query)
 
 
 async def update_player(
@@ -96,6 +162,20 @@ async def update_player(
 async def delete_player(uuid: UUID) -> None:
     query = delete(player).where(player.c.id == uuid)
     await execute_query(query, commit=True, return_result=False)
+    await after_commit(partial(invalidate_player_contexts, [uuid]))
+
+
+async def get_session_players(session_ids: list[UUID]) -> list[player]:
+    query = select(player.c.id, player.c.session_id).where(player.c.session_id.in_(session_ids))
+    return await execute_query(query, first_only=False)
+
+
+async def delete_session_players(session_ids: list[UUID]) -> list[player]:
+    query = delete(player).where(player.c.session_id.in_(session_ids)).returning(player.c.id)
+    players = await execute_query(query, commit=True, first_only=False)
+    if players:
+        await after_commit(partial(invalidate_player_contexts, [deleted_player.id for deleted_player in players]))
+    return players
 
 
 async def get_enemy(player_id: UUID, session_id: UUID) -> player:
@@ -103,4 +183,55 @@ async def get_enemy(player_id: UUID, session_id: UUID) -> player:
         player.c.id != player_id,
         player.c.session_id == session_id
     )
-    return await execute_query(query, commit=True)
\ No newline at end of file
+    return await execute_query(query)
+
+
+async def get_player_context(player_id: UUID) -> PlayerContext | None:
+    context = player_context_cache.get(player_id)
+    if context is not None:
+        return context
+
+    enemy = player.alias('enemy')
+    query = select(
+        player.c.id,
+        session.c.id.label('session_id'),
+        enemy.c.id.label('enemy_id'),
+    ).select_from(
+        player.outerjoin(
+            session, session.c.id == player.c.session_id
+        ).outerjoin(
+            enemy, and_(enemy.c.session_id == player.c.session_id, enemy.c.id != player.c.id)
+        )
+    ).where(player.c.id == player_id).limit(1)
+    row = await execute_query(query)
+    if row is None:
+        return None
+
+    context = PlayerContext(row.id, row.session_id, row.enemy_id)
+    if context.session_id is not None and context.enemy_id is not None:
+        player_context_cache.set(player_id, context)
+        player_context_cache.set(
+            context.enemy_id, PlayerContext(context.enemy_id, context.session_id, player_id)
+        )
+    return context
+
+
+def evict_player_contexts(player_ids: list[UUID]) -> None:
+    for player_id in player_ids:
+        context = player_context_cache.pop(player_id)
+        if context is not None:
+            player_context_cache.pop(context.enemy_id)
+
+
+async def invalidate_player_contexts(player_ids: list[UUID]) -> None:
+    evict_player_contexts(player_ids)
+    await backplane.publish(PLAYER_CACHE_CHANNEL, ','.join(str(player_id) for player_id in player_ids))
+    logger.debug('Player context invalidation published, players: %s', len(player_ids))
+
+
+async def subscribe_player_context_invalidation() -> None:
+    await backplane.subscribe(PLAYER_CACHE_CHANNEL, receive_player_context_invalidation)
+
+
+async def receive_player_context_invalidation(message: dict) -> None:
+    evict_player_contexts([UUID(player_id) for player_id in message['data'].decode('utf-8').split(',')])
\ No newline at end of file
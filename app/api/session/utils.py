@@ -1,17 +1,58 @@
+import asyncio
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import perf_counter_ns
+from uuid import UUID
+
 import bcrypt
 
+from api.config import settings
+from api.metrics import bcrypt_duration
+
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.BCRYPT_WORKERS,
+    thread_name_prefix='bcrypt'
+)
+
+bcrypt_hash_duration = bcrypt_duration.labels('hash')
+bcrypt_validate_duration = bcrypt_duration.labels('validate')
 
-def hash_password(password: str) -> bytes:
-    salt = bcrypt.gensalt()
+
+def hash_password_sync(password: str) -> bytes:
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode(), salt)
 
 
-def validate_password(password: str, hashed_password: bytes) -> bool:
+def validate_password_sync(password: str, hashed_password: bytes) -> bool:
     return bcrypt.checkpw(password.encode(), hashed_password)
 
 
-def check_full_board_in_hits(board: str, hits: str) -> bool:
-    for board_char, hits_char in zip(board, hits):
-        if board_char == '1' and hits_char != '1':
-            return False
-    return True
+async def hash_password(password: str) -> bytes:
+    loop = asyncio.get_running_loop()
+    started = perf_counter_ns()
+    try:
+        return await loop.run_in_executor(password_executor, hash_password_sync, password)
+    finally:
+        bcrypt_hash_duration.observe(perf_counter_ns() - started)
+
+
+async def validate_password(password: str, hashed_password: bytes) -> bool:
+    loop = asyncio.get_running_loop()
+    started = perf_counter_ns()
+    try:
+        return await loop.run_in_executor(
+            password_executor, validate_password_sync, password, hashed_password
+        )
+    finally:
+        bcrypt_validate_duration.observe(perf_counter_ns() - started)
+
+
+def encode_cursor(created_at: datetime, session_id: UUID) -> str:
+    value = f'{created_at.isoformat()}|{session_id}'
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    created_at, session_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(created_at), UUID(session_id)
@@ -0,0 +1,137 @@
+import struct
+from typing import Literal
+from uuid import UUID
+
+import orjson
+
+from api.session.websocket_request_types import WsRequestType
+from api.session.websocket_response_types import WsResponseType
+
+BINARY_SUBPROTOCOL = 'battleship.v1.bin'
+
+REQUEST_CODES: dict[WsRequestType, int] = {
+    WsRequestType.ENEMY_JOINED: 0x01,
+    WsRequestType.ENEMY_LEFT: 0x02,
+    WsRequestType.START_SESSION: 0x03,
+    WsRequestType.ENEMY_PLACEMENT_READY: 0x04,
+    WsRequestType.START_GAME: 0x05,
+    WsRequestType.ENEMY_ENTITIES: 0x06,
+    WsRequestType.YOUR_TURN: 0x07,
+    WsRequestType.PLAYER_HIT: 0x08,
+    WsRequestType.ENEMY_HIT: 0x09,
+    WsRequestType.WIN: 0x0A,
+    WsRequestType.DEFEAT: 0x0B,
+    WsRequestType.SNAPSHOT: 0x0C,
+}
+RESPONSE_TYPES: dict[int, WsResponseType] = {
+    0x81: WsResponseType.PLAYER_START_SESSION,
+    0x82: WsResponseType.PLAYER_PLACEMENT_READY,
+    0x83: WsResponseType.PLAYER_PLACEMENT_NOT_READY,
+    0x84: WsResponseType.PLAYER_START_GAME,
+    0x85: WsResponseType.HIT,
+}
+HIT_CODE = 0x85
+HIT_STATUS_CODES = {'miss': 0, 'hit': 1, 'destroy': 2}
+
+HIT_STRUCT = struct.Struct('!BI16s')
+HIT_RESPONSE_STRUCT = struct.Struct('!BI16sB')
+NO_ENTITY = bytes(16)
+
+
+class Frame:
+    __slots__ = ('text', 'binary', 'type')
+
+    def __init__(self, text: str, binary: bytes, message_type: WsRequestType) -> None:
+        self.text = text
+        self.binary = binary
+        self.type = message_type
+
+
+def encode_message(message_type: WsRequestType, detail: dict | None = None) -> str:
+    return orjson.dumps({'type': message_type, 'detail': detail or {}}).decode('utf-8')
+
+
+def encode_binary_message(message_type: WsRequestType, detail: dict | None = None) -> bytes:
+    code = bytes((REQUEST_CODES[message_type],))
+    if not detail:
+        return code
+    return code + orjson.dumps(detail)
+
+
+def encode_frame(message_type: WsRequestType, detail: dict | None = None) -> Frame:
+    return Frame(
+        encode_message(message_type, detail),
+        encode_binary_message(message_type, detail),
+        message_type
+    )
+
+
+def frame_prefix(message_type: WsRequestType) -> str:
+    return '{"type":%s,"detail":' % orjson.dumps(message_type).decode('utf-8')
+
+
+STATIC_FRAMES: dict[WsRequestType, Frame] = {
+    message_type: encode_frame(message_type) for message_type in REQUEST_CODES
+}
+
+PLAYER_HIT_PREFIX = frame_prefix(WsRequestType.PLAYER_HIT)
+ENEMY_HIT_PREFIX = frame_prefix(WsRequestType.ENEMY_HIT)
+
+
+def entity_id_to_bytes(entity_id: str) -> bytes:
+    try:
+        return UUID(entity_id).bytes
+    except ValueError:
+        return NO_ENTITY
+
+
+def entity_id_from_bytes(data: bytes) -> str:
+    if data == NO_ENTITY:
+        return ''
+    return str(UUID(bytes=data))
+
+
+def encode_hit_frames(
+        cell: int,
+        entity_id: str,
+        status: Literal['hit', 'miss', 'destroy']
+) -> tuple[Frame, Frame]:
+    detail = orjson.dumps({'cell': cell, 'entityId': entity_id, 'status': status}).decode('utf-8')
+    entity = entity_id_to_bytes(entity_id)
+    status_code = HIT_STATUS_CODES[status]
+    return (
+        Frame(
+            PLAYER_HIT_PREFIX + detail + '}',
+            HIT_RESPONSE_STRUCT.pack(REQUEST_CODES[WsRequestType.PLAYER_HIT], cell, entity, status_code),
+            WsRequestType.PLAYER_HIT
+        ),
+        Frame(
+            ENEMY_HIT_PREFIX + detail + '}',
+            HIT_RESPONSE_STRUCT.pack(REQUEST_CODES[WsRequestType.ENEMY_HIT], cell, entity, status_code),
+            WsRequestType.ENEMY_HIT
+        ),
+    )
+
+
+def text_to_binary(data: str) -> bytes:
+    message = orjson.loads(data)
+    message_type = WsRequestType(message['type'])
+    detail = message['detail']
+    if message_type in (WsRequestType.PLAYER_HIT, WsRequestType.ENEMY_HIT):
+        return HIT_RESPONSE_STRUCT.pack(
+            REQUEST_CODES[message_type],
+            detail['cell'],
+            entity_id_to_bytes(detail['entityId']),
+            HIT_STATUS_CODES[detail['status']]
+        )
+    return encode_binary_message(message_type, detail)
+
+
+def decode_binary_message(data: bytes) -> tuple[WsResponseType, dict]:
+    message_type = RESPONSE_TYPES[data[0]]
+    if data[0] == HIT_CODE:
+        _, cell, entity = HIT_STRUCT.unpack(data)
+        return message_type, {'cell': cell, 'entityId': entity_id_from_bytes(entity)}
+    if len(data) == 1:
+        return message_type, {}
+    return message_type, orjson.loads(data[1:])
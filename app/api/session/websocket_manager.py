@@ -1,26 +1,35 @@
+import asyncio
 import logging
 import random
-from typing import Literal
+from time import perf_counter_ns
+from typing import Awaitable, Callable, Literal
 from uuid import UUID
 
-from fastapi import WebSocket
-from starlette.websockets import WebSocketState
+from fastapi import WebSocket, status
+from starlette.websockets import WebSocketDisconnect, WebSocketState
 
-from api.session import services
+from api.common import sample_debug
+from api.metrics import registry, ws_send_duration
+from api.profiler import current_profile
 from api.session.exceptions import (
     WsPlayerNotFound
 )
-from api.session.redis_services import (
-    get_player_board,
-    add_player_hits,
-    add_entity_hits,
-    get_entity_size
-)
+from api.session import redis_services
+from api.session.backplane import backplane
+from api.session.game_state import GameState, writer
+from api.session.outbound import OutboundQueue
 from api.session.schemas import (
     Entities,
-    HitResponse
+    PlayerPlacement
+)
+from api.session.websocket_frames import (
+    BINARY_SUBPROTOCOL,
+    STATIC_FRAMES,
+    Frame,
+    encode_frame,
+    encode_hit_frames,
+    text_to_binary,
 )
-from api.session.utils import check_full_board_in_hits
 from api.session.websocket_request_types import WsRequestType
 from api.session.websocket_response_types import WsResponseType
 from api.session.websocket_utils import (
@@ -32,81 +41,93 @@ from api.session.websocket_utils import (
 logger = logging.getLogger(__name__)
 
 
-class Player:
-    __slots__ = ('websocket', 'enemy_joined', 'is_ready', 'turn')
-
-    def __init__(self, websocket: WebSocket) -> None:
-        self.websocket = websocket
-        self.enemy_joined = False
-        self.is_ready = False
-        self.turn = False
-
-
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: dict[UUID, Player] = {}
+        self.active_connections: dict[UUID, OutboundQueue] = {}
+        self.games: dict[UUID, GameState] = {}
+        self.pending_removals: dict[UUID, asyncio.Task] = {}
 
     async def connect(self, websocket: WebSocket, player_id: UUID):
-        await websocket.accept()
-        self.active_connections[player_id] = Player(websocket)
+        binary = BINARY_SUBPROTOCOL in websocket.scope.get('subprotocols', [])
+        await websocket.accept(subprotocol=BINARY_SUBPROTOCOL if binary else None)
+        previous = self.active_connections.get(player_id)
+        if previous is not None:
+            previous.stop()
+        player = self.active_connections[player_id] = OutboundQueue(player_id, websocket, binary)
+        player.start()
+        self.cancel_removal(player_id)
+        await backplane.subscribe(self.__channel(player_id), self.__deliver_message)
         logger.debug('Websocket connected, player_id: %s', player_id)
 
-    async def disconnect(self, player_id: UUID):
-        connection = self.active_connections.pop(player_id, None)
-        if connection:
-            if connection.websocket.client_state != WebSocketState.DISCONNECTED:
-                await connection.websocket.close()
+    async def disconnect(
+            self,
+            player_id: UUID,
+            websocket: WebSocket,
+            code: int = status.WS_1000_NORMAL_CLOSURE
+    ) -> bool:
+        connection = self.active_connections.get(player_id)
+        current = connection is not None and connection.websocket is websocket
+        if current:
+            del self.active_connections[player_id]
+            connection.stop()
+            await backplane.unsubscribe(self.__channel(player_id))
+        if (
+            websocket.client_state != WebSocketState.DISCONNECTED
+            and websocket.application_state != WebSocketState.DISCONNECTED
+        ):
+            await websocket.close(code=code)
+        if current:
             logger.debug('Websocket disconnected, player_id: %s', player_id)
+        else:
+            logger.debug('Stale websocket disconnected, player_id: %s', player_id)
+        return current
 
     async def login_session(
             self,
             websocket: WebSocket,
             session_id: UUID,
             player_id: UUID,
+            enemy_id: UUID | None,
     ) -> None:
-        enemy = await services.get_enemy(player_id, session_id)
-        if enemy is not None and enemy.id in self.active_connections:
+        if enemy_id is not None and await self.is_connected(enemy_id):
             await self.send_enemy_joined_message(to_id=player_id)
-            await self.send_enemy_joined_message(to_id=enemy.id)
-            self.active_connections[player_id].enemy_joined = True
-            self.active_connections[enemy.id].enemy_joined = True
+            await self.send_enemy_joined_message(to_id=enemy_id)
+            await redis_services.set_enemy_joined(session_id, player_id, enemy_id)
 
             await ws_receive_player_start_session_message(websocket)
             await self.send_start_session_message(to_id=player_id)
         else:
             await ws_receive_player_start_session_message(websocket)
-            if self.active_connections[player_id].enemy_joined:
+            if await redis_services.get_enemy_joined(session_id, player_id):
                 await self.send_start_session_message(to_id=player_id)
 
     async def start_game(
             self,
             websocket: WebSocket,
+            session_id: UUID,
             player_id: UUID,
             enemy_id: UUID
     ) -> bool:
         logger.debug('Player is ready, player_id: %s', player_id)
-        self.active_connections[player_id].is_ready = True
-        enemy_is_ready = self.active_connections[enemy_id].is_ready
+        enemy_is_ready = await redis_services.set_player_ready(session_id, player_id, enemy_id, True)
         if enemy_is_ready:
             await self.send_enemy_placement_ready_message(to_id=player_id)
             await self.send_enemy_placement_ready_message(to_id=enemy_id)
-            turn = random.choice([True, False])
-            self.active_connections[player_id].turn = turn
-            self.active_connections[enemy_id].turn = not turn
-            if turn is True:
-                await self.send_your_turn_message(to_id=player_id)
-            else:
-                await self.send_your_turn_message(to_id=enemy_id)
+            turn = random.choice([player_id, enemy_id])
+            self.games[session_id].turn = turn
+            await redis_services.set_turn(session_id, turn)
+            await self.send_your_turn_message(to_id=turn)
 
         while True:
             message = await ws_receive_message(websocket)
-            enemy_is_ready = self.active_connections[enemy_id].is_ready
+            enemy_is_ready = await redis_services.get_player_ready(session_id, enemy_id)
             if message.type == WsResponseType.PLAYER_START_GAME and enemy_is_ready:
+                await redis_services.set_player_in_game(session_id, player_id)
                 await self.send_start_game_message(to_id=player_id)
                 return True
             elif message.type == WsResponseType.PLAYER_PLACEMENT_NOT_READY and not enemy_is_ready:
                 logger.debug('Player is not ready, player_id: %s', player_id)
-                self.active_connections[player_id].is_ready = False
+                await redis_services.set_player_ready(session_id, player_id, enemy_id, False)
                 break
 
     async def handle_hit(
@@ -115,68 +136,146 @@ class ConnectionManager:
             session_id: UUID,
             player_id: UUID,
             enemy_id: UUID
-    ) -> None:
+    ) -> bool:
         message = await ws_receive_player_hit_message(websocket)
 
-        if self.active_connections[player_id].turn is False:
-            return
+        game = self.games.get(session_id)
+        if game is not None and not game.stale and player_id in game.boards and enemy_id in game.boards:
+            if game.turn != player_id:
+                return game.boards[player_id].remaining <= 0 or game.boards[enemy_id].remaining <= 0
+            status, entity_id = game.resolve_hit(enemy_id, message.cell)
+            if status == 'miss':
+                game.turn = enemy_id
+            elif status == 'win':
+                game.turn = None
+            if status != 'repeat':
+                writer.mark(game)
+        else:
+            status, entity_id = await redis_services.resolve_hit(
+                session_id, player_id, enemy_id, message.cell
+            )
 
         response_data = {
             'player_id': player_id,
             'enemy_id': enemy_id,
             'cell': message.cell,
-            'entity_id': message.entity_id
+            'entity_id': entity_id
         }
-        board = await get_player_board(session_id, enemy_id)
-        hits = await add_player_hits(session_id, enemy_id, message.cell)
-        if board[message.cell] == '0':
+        if status == 'finished':
+            return True
+        elif status == 'not_turn':
+            return False
+        elif status == 'repeat':
+            logger.debug('Cell already hit, player_id: %s, cell: %s', player_id, message.cell)
+        elif status == 'miss':
             await self.send_hit_response_to_players(**response_data, status='miss')
-            self.active_connections[player_id].turn = not self.active_connections[player_id].turn
-            self.active_connections[enemy_id].turn = not self.active_connections[player_id].turn
             await self.send_your_turn_message(to_id=enemy_id)
+        elif status == 'win':
+            await self.send_hit_response_to_players(**response_data, status='destroy')
+            await self.send_win_message(to_id=player_id)
+            await self.send_defeat_message(to_id=enemy_id)
+            return True
         else:
-            if check_full_board_in_hits(board, hits):
-                await self.send_hit_response_to_players(**response_data, status='destroy')
-                await self.send_win_message(to_id=player_id)
-                await self.send_defeat_message(to_id=enemy_id)
-            else:
-                entity_hits = await add_entity_hits(
-                    session_id,
-                    enemy_id,
-                    message.entity_id,
-                    1
-                )
-                entity_size = await get_entity_size(
-                    session_id,
-                    enemy_id,
-                    message.entity_id
-                )
-                if entity_hits >= entity_size:
-                    await self.send_hit_response_to_players(**response_data, status='destroy')
-                else:
-                    await self.send_hit_response_to_players(**response_data, status='hit')
-
-                await self.send_your_turn_message(to_id=player_id)
+            await self.send_hit_response_to_players(**response_data, status=status)
+            await self.send_your_turn_message(to_id=player_id)
+        return False
+
+    async def add_player_placement(
+            self,
+            session_id: UUID,
+            player_id: UUID,
+            placement: PlayerPlacement
+    ) -> None:
+        game = self.games.setdefault(session_id, GameState(session_id))
+        game.add_player(player_id, placement.entities)
+        await redis_services.set_player_data(
+            session_id, player_id, placement.entities
+        )
+        logger.debug('Player placement added to redis, session_id: %s, player_id: %s', session_id, player_id)
+
+    async def resume_game(self, session_id: UUID, player_id: UUID, enemy_id: UUID) -> dict | None:
+        await writer.flush()
+        snapshot = await redis_services.get_game_snapshot(session_id, player_id, enemy_id)
+        if snapshot is None:
+            return None
+        await self.__send_frame(player_id, encode_frame(WsRequestType.SNAPSHOT, snapshot))
+        logger.debug('Game resumed, session_id: %s, player_id: %s', session_id, player_id)
+        return snapshot
+
+    def schedule_removal(
+            self,
+            player_id: UUID,
+            delay: float,
+            remove: Callable[[], Awaitable[None]]
+    ) -> None:
+        self.cancel_removal(player_id)
+        self.pending_removals[player_id] = asyncio.create_task(self.__remove_later(player_id, delay, remove))
+        logger.debug('Player removal scheduled, player_id: %s, delay: %s', player_id, delay)
+
+    def cancel_removal(self, player_id: UUID) -> None:
+        task = self.pending_removals.pop(player_id, None)
+        if task is not None:
+            task.cancel()
+            logger.debug('Player removal cancelled, player_id: %s', player_id)
+
+    def leave_game(self, session_id: UUID, player_id: UUID) -> None:
+        game = self.games.get(session_id)
+        if game is not None:
+            writer.collect(game)
+            game.boards.pop(player_id, None)
+            if not game.boards:
+                del self.games[session_id]
+
+    def end_game(self, session_id: UUID) -> None:
+        self.games.pop(session_id, None)
+        writer.discard(session_id)
+
+    async def is_connected(self, player_id: UUID) -> bool:
+        if player_id in self.active_connections:
+            return True
+        return await backplane.count_subscribers(self.__channel(player_id)) > 0
+
+    async def get_connected_players(self, player_ids: list[UUID]) -> set[UUID]:
+        connected = {player_id for player_id in player_ids if player_id in self.active_connections}
+        remote = [player_id for player_id in player_ids if player_id not in connected]
+        if remote:
+            counts = await backplane.count_subscribers_many([self.__channel(player_id) for player_id in remote])
+            connected.update(player_id for player_id, count in zip(remote, counts) if count > 0)
+        return connected
+
+    async def release_sessions(self, session_ids: list[UUID], player_ids: list[UUID]) -> None:
+        for session_id in session_ids:
+            self.end_game(session_id)
+        for player_id in player_ids:
+            self.cancel_removal(player_id)
+            connection = self.active_connections.get(player_id)
+            if connection is None:
+                continue
+            try:
+                await connection.websocket.close(code=status.WS_1001_GOING_AWAY)
+            except (WebSocketDisconnect, RuntimeError):
+                logger.warning('Cannot close reaped websocket, player_id: %s', player_id)
+        logger.debug('Reaped sessions released, sessions: %s, players: %s', len(session_ids), len(player_ids))
 
     async def send_enemy_joined_message(self, to_id: UUID) -> None:
-        await self.__send_message(to_id, WsRequestType.ENEMY_JOINED)
+        await self.__send_frame(to_id, STATIC_FRAMES[WsRequestType.ENEMY_JOINED])
 
     async def send_enemy_left_message(self, to_id: UUID) -> None:
-        await self.__send_message(to_id, WsRequestType.ENEMY_LEFT)
+        await self.__send_frame(to_id, STATIC_FRAMES[WsRequestType.ENEMY_LEFT], required=False)
 
     async def send_start_session_message(self, to_id: UUID) -> None:
-        await self.__send_message(to_id, WsRequestType.START_SESSION)
+        await self.__send_frame(to_id, STATIC_FRAMES[WsRequestType.START_SESSION])
         logger.debug('Session start, player_id: %s', to_id)
 
     async def send_enemy_placement_ready_message(self, to_id: UUID) -> None:
-        await self.__send_message(to_id, WsRequestType.ENEMY_PLACEMENT_READY)
+        await self.__send_frame(to_id, STATIC_FRAMES[WsRequestType.ENEMY_PLACEMENT_READY])
 
     async def send_start_game_message(self, to_id: UUID) -> None:
-        await self.__send_message(to_id, WsRequestType.START_GAME)
+        await self.__send_frame(to_id, STATIC_FRAMES[WsRequestType.START_GAME])
         logger.debug('Game start, player_id: %s', to_id)
 
     async def send_your_turn_message(self, to_id: UUID) -> None:
-        await self.__send_message(to_id, WsRequestType.YOUR_TURN)
+        await self.__send_frame(to_id, STATIC_FRAMES[WsRequestType.YOUR_TURN], required=False)
         logger.debug('Turn, player_id: %s', to_id)
 
     async def send_player_entities_message(
@@ -184,8 +283,8 @@ class ConnectionManager:
             to_id: UUID,
             entities: Entities
     ) -> None:
-        detail = entities.to_dict()
-        await self.__send_message(to_id, WsRequestType.ENEMY_ENTITIES, detail)
+        frame = encode_frame(WsRequestType.ENEMY_ENTITIES, entities.to_dict())
+        await self.__send_frame(to_id, frame, required=False)
 
     async def send_hit_response_to_players(
             self,
@@ -195,38 +294,78 @@ class ConnectionManager:
             entity_id: str,
             status: Literal['hit', 'miss', 'destroy']
     ) -> None:
-        detail = HitResponse(
-            cell=cell,
-            entity_id=entity_id,
-            status=status
-        ).model_dump(by_alias=True)
-        await self.__send_message(player_id, WsRequestType.PLAYER_HIT, detail)
-        await self.__send_message(enemy_id, WsRequestType.ENEMY_HIT, detail)
+        player_frame, enemy_frame = encode_hit_frames(cell, entity_id, status)
+        await self.__send_frame(player_id, player_frame, required=False)
+        await self.__send_frame(enemy_id, enemy_frame, required=False)
 
     async def send_win_message(self, to_id: UUID) -> None:
-        await self.__send_message(to_id, WsRequestType.WIN)
+        await self.__send_frame(to_id, STATIC_FRAMES[WsRequestType.WIN], required=False)
 
     async def send_defeat_message(self, to_id: UUID) -> None:
-        await self.__send_message(to_id, WsRequestType.DEFEAT)
+        await self.__send_frame(to_id, STATIC_FRAMES[WsRequestType.DEFEAT], required=False)
 
-    async def __send_message(
-            self,
-            player_id: UUID,
-            message_type: WsRequestType,
-            detail: dict | str | None = None
-    ) -> None:
-        if player_id not in self.active_connections:
+    async def __send_frame(self, player_id: UUID, frame: Frame, required: bool = True) -> None:
+        started = perf_counter_ns()
+        player = self.active_connections.get(player_id)
+        if player is not None:
+            player.send(frame.type, frame.binary if player.binary else frame.text)
+            self.__observe_send(frame, started)
+        elif await backplane.publish(self.__channel(player_id), frame.text) > 0:
+            ws_send_duration.labels(frame.type).observe(perf_counter_ns() - started)
+            self.__observe_send(frame, started)
+            if sample_debug(logger):
+                logger.debug('Message published to player', extra={'player_id': player_id, 'data': frame.text})
+        elif required:
             logger.warning('Player for message not found, player_id: %s', player_id)
             raise WsPlayerNotFound
-        connection = self.active_connections[player_id].websocket
-        if connection.client_state == WebSocketState.CONNECTED:
-            if detail is None:
-                detail = {}
-            message = {"type": message_type, "detail": detail}
-            await connection.send_json(message)
-            logger.debug('Message sent to player, player_id: %s, message:\n%s', player_id, message)
         else:
-            logger.warning('Cannot send message to disconnected websocket, player_id: %s', player_id)
+            logger.debug('Player for message is away, message dropped, player_id: %s', player_id)
+
+    @staticmethod
+    def __observe_send(frame: Frame, started: int) -> None:
+        profile = current_profile.get()
+        if profile is not None:
+            profile.record(f'send.{frame.type}', perf_counter_ns() - started)
+
+    async def __deliver_message(self, message: dict) -> None:
+        player_id = UUID(message['channel'].decode('utf-8').removeprefix('ws:player:'))
+        player = self.active_connections.get(player_id)
+        if player is not None:
+            data = message['data'].decode('utf-8')
+            player.send(None, text_to_binary(data) if player.binary else data)
+
+    async def __remove_later(
+            self,
+            player_id: UUID,
+            delay: float,
+            remove: Callable[[], Awaitable[None]]
+    ) -> None:
+        await asyncio.sleep(delay)
+        self.pending_removals.pop(player_id, None)
+        try:
+            if await self.is_connected(player_id):
+                logger.debug('Player reconnected, removal skipped, player_id: %s', player_id)
+                return
+            await remove()
+        except Exception:
+            logger.exception('Player removal failed, player_id: %s', player_id)
+
+    @staticmethod
+    def __channel(player_id: UUID) -> str:
+        return f'ws:player:{player_id}'
 
 
 manager = ConnectionManager()
+
+registry.gauge(
+    'battleship_active_websockets', 'Player websockets connected to this worker',
+    lambda: len(manager.active_connections)
+)
+registry.gauge(
+    'battleship_ws_outbound_queued', 'Messages waiting in outbound queues of this worker',
+    lambda: sum(len(player.queue) for player in manager.active_connections.values())
+)
+registry.gauge(
+    'battleship_games_in_progress', 'Games with board state held by this worker',
+    lambda: len(manager.games)
+)
@@ -13,3 +13,7 @@ class WsRequestType(StrEnum):
     ENEMY_HIT = 'EnemyHit'
     WIN = 'Win'
     DEFEAT = 'Defeat'
+    SNAPSHOT = 'Snapshot'
+    SESSION_ADDED = 'SessionAdded'
+    SESSION_FILLED = 'SessionFilled'
+    SESSION_REMOVED = 'SessionRemoved'
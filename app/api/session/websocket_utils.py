@@ -1,18 +1,87 @@
-import json
 import logging
+import struct
+import time
+from time import perf_counter_ns
 
+import orjson
 import pydantic
 from fastapi import WebSocket
+from starlette.websockets import WebSocketDisconnect
 
+from api.common import sample_debug
+from api.config import settings
+from api.metrics import (
+    ws_flood_disconnects,
+    ws_handling_duration,
+    ws_invalid_messages,
+    ws_rejected_messages
+)
+from api.profiler import current_profile
+from api.rate_limit import TokenBucket
+from api.session.exceptions import WsTooManyInvalidFrames
+from api.session.placement import GRID_SIZE, validate_placement
 from api.session.schemas import (
-    WsMessageModel,
+    WsMessage,
     PlayerPlacement,
-    Hit
+    Hit,
+    ws_message_adapter
 )
+from api.session.websocket_frames import RESPONSE_TYPES, decode_binary_message
 from api.session.websocket_response_types import WsResponseType
 
 logger = logging.getLogger(__name__)
 
+HANDLING_SCOPE_KEY = 'battleship.handling'
+LIMITER_SCOPE_KEY = 'battleship.limiter'
+
+UNKNOWN_TYPE_ERRORS = frozenset(('dict_type', 'union_tag_invalid', 'union_tag_not_found'))
+
+invalid_text_messages = ws_invalid_messages.labels('text')
+invalid_binary_messages = ws_invalid_messages.labels('binary')
+invalid_frames_disconnects = ws_flood_disconnects.labels('invalid_frames')
+rate_limited_messages = ws_rejected_messages.labels('rate_limited')
+
+
+class InboundLimiter:
+    __slots__ = ('connection', 'types', 'strikes', 'now')
+
+    def __init__(self) -> None:
+        self.connection = TokenBucket(settings.WS_MESSAGE_RATE, settings.WS_MESSAGE_BURST)
+        self.types: dict[str | int, TokenBucket] = {}
+        self.strikes = 0
+        self.now = 0.0
+
+    def allow_frame(self) -> bool:
+        if settings.WS_MESSAGE_RATE <= 0:
+            return True
+        self.now = time.monotonic()
+        return self.connection.take(self.now)
+
+    def allow_type(self, type_key: str | int) -> bool:
+        if settings.WS_MESSAGE_RATE <= 0:
+            return True
+        bucket = self.types.get(type_key)
+        if bucket is None:
+            bucket = self.types[type_key] = TokenBucket(settings.WS_TYPE_RATE, settings.WS_TYPE_BURST)
+        return bucket.take(self.now)
+
+
+def ws_limiter(websocket: WebSocket) -> InboundLimiter:
+    limiter = websocket.scope.get(LIMITER_SCOPE_KEY)
+    if limiter is None:
+        limiter = websocket.scope[LIMITER_SCOPE_KEY] = InboundLimiter()
+    return limiter
+
+
+async def ws_reject_message(websocket: WebSocket, reason: str) -> None:
+    ws_rejected_messages.labels(reason).inc()
+    limiter = ws_limiter(websocket)
+    limiter.strikes += 1
+    if limiter.strikes >= settings.WS_MAX_INVALID_FRAMES:
+        invalid_frames_disconnects.inc()
+        logger.warning('Too many invalid websocket frames, closing connection, strikes: %s', limiter.strikes)
+        raise WsTooManyInvalidFrames
+
 
 async def ws_receive_player_start_session_message(websocket: WebSocket) -> dict:
     return await ws_receive_message_by_type(websocket, WsResponseType.PLAYER_START_SESSION)
@@ -20,45 +89,93 @@ async def ws_receive_player_start_session_message(websocket: WebSocket) -> dict:
 
 async def ws_receive_player_placement_ready_message(websocket: WebSocket) -> PlayerPlacement:
     while True:
-        message = await ws_receive_message_by_type(websocket, WsResponseType.PLAYER_PLACEMENT_READY)
-        try:
-            detail = PlayerPlacement(**message)
+        detail = await ws_receive_message_by_type(websocket, WsResponseType.PLAYER_PLACEMENT_READY)
+        error = validate_placement(detail)
+        if error is None:
             return detail
-        except pydantic.ValidationError:
-            logger.warning('Invalid player placement message format!')
+        logger.warning('Invalid player placement: %s', error)
+        await ws_reject_message(websocket, 'invalid_detail')
 
 
 async def ws_receive_player_hit_message(websocket: WebSocket) -> Hit:
     while True:
-        message = await ws_receive_message_by_type(websocket, WsResponseType.HIT)
-        try:
-            detail = Hit(**message)
-            if detail.cell < 0 or detail.cell > 99:
-                raise pydantic.ValidationError
+        detail = await ws_receive_message_by_type(websocket, WsResponseType.HIT)
+        if 0 <= detail.cell < GRID_SIZE:
             return detail
-        except pydantic.ValidationError:
-            logger.warning('Invalid player hit message format!')
+        logger.warning('Invalid player hit message format!')
+        await ws_reject_message(websocket, 'invalid_detail')
 
 
 async def ws_receive_message_by_type(
         websocket: WebSocket,
         message_type: WsResponseType
-) -> dict:
+) -> dict | PlayerPlacement | Hit:
     while True:
         message = await ws_receive_message(websocket)
         if message.type == message_type:
             return message.detail
+        await ws_reject_message(websocket, 'out_of_phase')
+
 
+async def ws_receive_message(websocket: WebSocket) -> WsMessage:
+    handling = websocket.scope.pop(HANDLING_SCOPE_KEY, None)
+    if handling is not None:
+        message_type, received = handling
+        duration = perf_counter_ns() - received
+        ws_handling_duration.labels(message_type).observe(duration)
+        profile = current_profile.get()
+        if profile is not None:
+            profile.record(f'handle.{message_type}', duration)
 
-async def ws_receive_message(websocket: WebSocket) -> WsMessageModel:
+    limiter = ws_limiter(websocket)
     while True:
-        data = await websocket.receive_text()
-        logger.debug('Received data:\n%s', data)
-        try:
-            json_message = json.loads(data)
-            message = WsMessageModel(**json_message)
-            return message
-        except json.decoder.JSONDecodeError:
-            logger.warning('Data is invalid JSON!')
-        except pydantic.ValidationError:
-            logger.warning('Invalid JSON format!')
+        frame = await websocket.receive()
+        received = perf_counter_ns()
+        if frame['type'] == 'websocket.disconnect':
+            raise WebSocketDisconnect(frame['code'], frame.get('reason'))
+        if not limiter.allow_frame():
+            rate_limited_messages.inc()
+            continue
+
+        data = frame.get('text')
+        if data is None:
+            data = frame['bytes']
+            if sample_debug(logger):
+                logger.debug('Received binary data', extra={'size': len(data), 'data': data.hex()})
+            type_key = data[0] if data else None
+            if type_key not in RESPONSE_TYPES:
+                await ws_reject_message(websocket, 'unknown_type')
+                continue
+            if not limiter.allow_type(type_key):
+                rate_limited_messages.inc()
+                continue
+            try:
+                message_type, detail = decode_binary_message(data)
+                message = ws_message_adapter.validate_python({'type': message_type, 'detail': detail})
+            except (IndexError, KeyError, ValueError, struct.error, orjson.JSONDecodeError):
+                invalid_binary_messages.inc()
+                logger.warning('Data is invalid binary frame!')
+                await ws_reject_message(websocket, 'invalid_frame')
+                continue
+        else:
+            if sample_debug(logger):
+                logger.debug('Received data', extra={'size': len(data), 'data': data})
+            try:
+                message = ws_message_adapter.validate_json(data)
+            except pydantic.ValidationError as exc:
+                error_type = exc.errors(include_url=False, include_context=False)[0]['type']
+                if error_type in UNKNOWN_TYPE_ERRORS:
+                    await ws_reject_message(websocket, 'unknown_type')
+                    continue
+                invalid_text_messages.inc()
+                if error_type == 'json_invalid':
+                    logger.warning('Data is invalid JSON!')
+                else:
+                    logger.warning('Invalid message format!', extra={'errors': exc.error_count()})
+                await ws_reject_message(websocket, 'invalid_frame')
+                continue
+            if not limiter.allow_type(message.type.value):
+                rate_limited_messages.inc()
+                continue
+        websocket.scope[HANDLING_SCOPE_KEY] = (message.type, received)
+        return message
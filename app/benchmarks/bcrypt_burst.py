@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import time
+from uuid import UUID, uuid4
+
+from api.config import settings
+from api.session.game_state import GameState
+from api.session.schemas import EntityData
+from api.session.utils import (
+    hash_password_sync,
+    validate_password,
+    validate_password_sync
+)
+from benchmarks.common import summarize
+
+GRID_SIZE = settings.GRID_SIZE_X * settings.GRID_SIZE_Y
+
+
+def new_game() -> tuple[GameState, UUID]:
+    player_id = uuid4()
+    entity_id = uuid4()
+    game = GameState(uuid4())
+    game.add_player(
+        player_id,
+        {entity_id: EntityData(cells=[0], size=1, direction=0)}
+    )
+    return game, player_id
+
+
+async def play_shots(duration: float, interval: float) -> list[float]:
+    latencies = []
+    game, player_id = new_game()
+    cell = GRID_SIZE - 1
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        fire_at = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        if cell == 0:
+            game, player_id = new_game()
+            cell = GRID_SIZE - 1
+        game.resolve_hit(player_id, cell)
+        cell -= 1
+        latencies.append((time.perf_counter() - fire_at) * 1000)
+    return latencies
+
+
+async def login_sync(password: str, hashed_password: bytes) -> None:
+    validate_password_sync(password, hashed_password)
+
+
+async def login_offloaded(password: str, hashed_password: bytes) -> None:
+    await validate_password(password, hashed_password)
+
+
+async def run_scenario(
+        name: str,
+        login,
+        logins: int,
+        duration: float,
+        interval: float,
+        hashed_password: bytes
+) -> None:
+    shots = asyncio.create_task(play_shots(duration, interval))
+    started = time.perf_counter()
+    if login is not None:
+        await asyncio.gather(*(login('password', hashed_password) for _ in range(logins)))
+    burst = time.perf_counter() - started
+    stats = summarize(await shots)
+    print(
+        f'{name:<12} logins={logins if login else 0:<4} burst={burst:6.2f}s '
+        f'hit lag ms: p50={stats["p50"]:7.2f} p99={stats["p99"]:7.2f} max={stats["max"]:7.2f}'
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    hashed_password = hash_password_sync('password')
+    await run_scenario('idle', None, 0, args.duration, args.interval, hashed_password)
+    await run_scenario('sync', login_sync, args.logins, args.duration, args.interval, hashed_password)
+    await run_scenario('offloaded', login_offloaded, args.logins, args.duration, args.interval, hashed_password)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Measure in-game hit latency while a burst of lobby logins runs bcrypt'
+    )
+    parser.add_argument('--logins', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--interval', type=float, default=0.005)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,20 @@
+import statistics
+
+
+def percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    return {
+        'count': len(values),
+        'mean': statistics.fmean(values) if values else 0.0,
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values, default=0.0),
+    }
@@ -0,0 +1,311 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import time
+from collections import defaultdict, deque
+from uuid import uuid4
+
+import httpx
+import orjson
+import websockets
+
+from benchmarks.common import summarize
+
+
+def use_fake_redis() -> None:
+    import fakeredis
+
+    from api import database
+
+    fake_redis = fakeredis.FakeAsyncRedis()
+    database.redis_client = fake_redis
+    database.redis_pool = fake_redis.connection_pool
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.games = 0
+        self.failures = 0
+
+    def record(self, name: str, started: float) -> None:
+        self.latencies[name].append((time.perf_counter() - started) * 1000)
+
+
+class Codec:
+    def __init__(self, binary: bool) -> None:
+        from api.session import websocket_frames as frames
+
+        self.binary = binary
+        self.frames = frames
+        self.request_types = {code: message_type for message_type, code in frames.REQUEST_CODES.items()}
+        self.response_codes = {message_type: code for code, message_type in frames.RESPONSE_TYPES.items()}
+        self.hit_types = {frames.REQUEST_CODES[message_type] for message_type in ('PlayerHit', 'EnemyHit')}
+        self.statuses = {code: status for status, code in frames.HIT_STATUS_CODES.items()}
+
+    def encode(self, message_type: str, detail: dict) -> str | bytes:
+        if not self.binary:
+            return orjson.dumps({'type': message_type, 'detail': detail}).decode('utf-8')
+        code = self.response_codes[message_type]
+        if code == self.frames.HIT_CODE:
+            return self.frames.HIT_STRUCT.pack(code, detail['cell'], self.frames.NO_ENTITY)
+        return bytes((code,)) + (orjson.dumps(detail) if detail else b'')
+
+    def decode(self, data: str | bytes) -> tuple[str, dict]:
+        if isinstance(data, str):
+            message = orjson.loads(data)
+            return message['type'], message['detail']
+        message_type = self.request_types[data[0]]
+        if data[0] in self.hit_types:
+            _, cell, entity, status = self.frames.HIT_RESPONSE_STRUCT.unpack(data)
+            return message_type, {
+                'cell': cell,
+                'entityId': self.frames.entity_id_from_bytes(entity),
+                'status': self.statuses[status]
+            }
+        return message_type, orjson.loads(data[1:]) if len(data) > 1 else {}
+
+
+def random_fleet(sizes: list[int]) -> tuple[str | None, dict]:
+    from api.session.placement import DIRECTION_STEPS, GRID_SIZE, GRID_SIZE_X, neighbour_offsets
+
+    occupied: set[int] = set()
+    entities = {}
+    for size in sizes:
+        while True:
+            direction = random.choice(list(DIRECTION_STEPS))
+            step = DIRECTION_STEPS[direction]
+            start = random.randrange(GRID_SIZE)
+            cells = list(range(start, start + step * size, step))
+            if cells[-1] >= GRID_SIZE or (step == 1 and start // GRID_SIZE_X != cells[-1] // GRID_SIZE_X):
+                continue
+            halo = {cell + offset for cell in cells for offset in neighbour_offsets(cell)}
+            if occupied.isdisjoint(halo):
+                break
+        occupied.update(cells)
+        entities[str(uuid4())] = {'cells': cells, 'size': size, 'direction': direction}
+
+    board = None
+    if GRID_SIZE <= 10000:
+        board = ''.join('1' if cell in occupied else '0' for cell in range(GRID_SIZE))
+    return board, entities
+
+
+class SimulatedPlayer:
+    def __init__(self, websocket, codec: Codec, metrics: Metrics) -> None:
+        self.websocket = websocket
+        self.codec = codec
+        self.metrics = metrics
+        self.buffer: deque[tuple[str, dict]] = deque()
+
+    async def send(self, message_type: str, detail: dict) -> float:
+        await self.websocket.send(self.codec.encode(message_type, detail))
+        return time.perf_counter()
+
+    async def next(self, timeout: float) -> tuple[str, dict]:
+        if self.buffer:
+            return self.buffer.popleft()
+        return self.codec.decode(await asyncio.wait_for(self.websocket.recv(), timeout))
+
+    async def expect(self, message_type: str, timeout: float) -> dict:
+        for index, (buffered_type, detail) in enumerate(self.buffer):
+            if buffered_type == message_type:
+                del self.buffer[index]
+                return detail
+        while True:
+            received_type, detail = self.codec.decode(await asyncio.wait_for(self.websocket.recv(), timeout))
+            if received_type == message_type:
+                return detail
+            self.buffer.append((received_type, detail))
+
+    async def play(self, fleet: list[int], grid_size: int, timeout: float) -> str:
+        await self.expect('EnemyJoined', timeout)
+        started = await self.send('PlayerStartSession', {})
+        await self.expect('StartSession', timeout)
+        self.metrics.record('StartSession', started)
+
+        board, entities = random_fleet(fleet)
+        placement = {'entities': entities}
+        if board is not None:
+            placement['board'] = board
+        await self.send('PlayerPlacementReady', placement)
+        await self.expect('EnemyPlacementReady', timeout)
+        started = await self.send('PlayerStartGame', {})
+        await self.expect('StartGame', timeout)
+        self.metrics.record('StartGame', started)
+
+        cells = list(range(grid_size))
+        random.shuffle(cells)
+        started = None
+        while True:
+            message_type, _ = await self.next(timeout)
+            if message_type == 'YourTurn':
+                started = await self.send('Hit', {'cell': cells.pop()})
+            elif message_type == 'PlayerHit' and started is not None:
+                self.metrics.record('PlayerHit', started)
+                started = None
+            elif message_type in ('Win', 'Defeat'):
+                return message_type
+
+
+async def play_game(
+        client: httpx.AsyncClient,
+        ws_url: str,
+        codec: Codec,
+        metrics: Metrics,
+        fleet: list[int],
+        grid_size: int,
+        timeout: float,
+        stagger: float
+) -> None:
+    name = f'load-{uuid4().hex}'
+    started = time.perf_counter()
+    response = await client.post('/api/v1/session/create', json={'name': name, 'password': 'password'})
+    response.raise_for_status()
+    metrics.record('create', started)
+    first_id = response.json()['playerId']
+
+    started = time.perf_counter()
+    response = await client.post('/api/v1/session/login', json={'name': name, 'password': 'password'})
+    response.raise_for_status()
+    metrics.record('login', started)
+    second_id = response.json()['playerId']
+
+    subprotocols = [codec.frames.BINARY_SUBPROTOCOL] if codec.binary else None
+    started = time.perf_counter()
+    async with websockets.connect(f'{ws_url}?player_id={first_id}', subprotocols=subprotocols) as first:
+        metrics.record('connect', started)
+        first_player = asyncio.create_task(SimulatedPlayer(first, codec, metrics).play(fleet, grid_size, timeout))
+        await asyncio.sleep(stagger)
+        started = time.perf_counter()
+        async with websockets.connect(f'{ws_url}?player_id={second_id}', subprotocols=subprotocols) as second:
+            metrics.record('connect', started)
+            results = await asyncio.gather(
+                first_player,
+                SimulatedPlayer(second, codec, metrics).play(fleet, grid_size, timeout)
+            )
+    if sorted(results) != ['Defeat', 'Win']:
+        raise RuntimeError(f'Unexpected game result: {results}')
+
+
+async def run_load(args: argparse.Namespace, base_url: str) -> Metrics:
+    from api.config import settings
+
+    metrics = Metrics()
+    codec = Codec(args.binary)
+    fleet = [int(size) for size in args.fleet.split(',')]
+    grid_size = settings.GRID_SIZE_X * settings.GRID_SIZE_Y
+    ws_url = base_url.replace('http', 'ws', 1) + '/api/v1/session/ws'
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        async with semaphore:
+            try:
+                await play_game(client, ws_url, codec, metrics, fleet, grid_size, args.timeout, args.stagger)
+                metrics.games += 1
+            except Exception as exc:
+                metrics.failures += 1
+                print(f'game failed: {exc!r}')
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        await asyncio.gather(*(worker(client) for _ in range(args.games)))
+    return metrics
+
+
+async def serve_and_run(args: argparse.Namespace) -> tuple[Metrics, float]:
+    import uvicorn
+
+    if args.fake_redis:
+        use_fake_redis()
+    from api.main import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    try:
+        started = time.perf_counter()
+        metrics = await run_load(args, f'http://127.0.0.1:{port}')
+        return metrics, time.perf_counter() - started
+    finally:
+        server.should_exit = True
+        await serving
+
+
+async def connect_and_run(args: argparse.Namespace) -> tuple[Metrics, float]:
+    started = time.perf_counter()
+    metrics = await run_load(args, args.url.rstrip('/'))
+    return metrics, time.perf_counter() - started
+
+
+def report(metrics: Metrics, elapsed: float, output: str | None) -> None:
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results = {
+        'games': metrics.games,
+        'failures': metrics.failures,
+        'elapsed': elapsed,
+        'games_per_second': metrics.games / elapsed if elapsed else 0.0,
+        'peak_memory_mb': peak_memory,
+        'latency_ms': {name: summarize(values) for name, values in sorted(metrics.latencies.items())},
+    }
+    print(
+        f'games={metrics.games} failures={metrics.failures} elapsed={elapsed:.2f}s '
+        f'games/s={results["games_per_second"]:.2f} peak rss={peak_memory:.1f}MB'
+    )
+    for name, stats in results['latency_ms'].items():
+        print(
+            f'{name:<14} n={stats["count"]:<7} p50={stats["p50"]:8.2f} '
+            f'p95={stats["p95"]:8.2f} p99={stats["p99"]:8.2f} max={stats["max"]:8.2f} ms'
+        )
+    if output:
+        with open(output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+def main(args: argparse.Namespace) -> None:
+    os.environ['LOGGING_LEVEL'] = str(args.log_level)
+    os.environ.setdefault('WS_MESSAGE_RATE', '0')
+    os.environ['FLEET'] = args.fleet
+    if args.url:
+        metrics, elapsed = asyncio.run(connect_and_run(args))
+    else:
+        metrics, elapsed = asyncio.run(serve_and_run(args))
+    report(metrics, elapsed, args.output)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Play full games against the API with simulated players and report latencies',
+        epilog=(
+            'Without --url the app runs in-process and needs a real Postgres reachable through the '
+            'POSTGRES_* settings, with migrations applied (alembic upgrade head). Only Redis can be '
+            'replaced, with --fake-redis.'
+        )
+    )
+    parser.add_argument('--games', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--fleet', default='4,3,3,2,2,2,1,1,1,1')
+    parser.add_argument('--binary', action='store_true', help='use the binary websocket subprotocol')
+    parser.add_argument('--url', help='target a running server instead of starting the app in-process')
+    parser.add_argument(
+        '--fake-redis',
+        action='store_true',
+        help='replace Redis with an in-process fakeredis; Postgres is still required'
+    )
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--stagger', type=float, default=0.05, help='delay before the second player connects')
+    parser.add_argument('--log-level', type=int, default=30, help='LOGGING_LEVEL for the in-process app')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    main(parser.parse_args())
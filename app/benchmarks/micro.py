@@ -0,0 +1,222 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from uuid import uuid4
+
+
+def tile_fleet(ships: int, grid_x: int, grid_y: int) -> dict[str, dict] | None:
+    entities = {}
+    size = 1
+    for row in range(0, grid_y, 2):
+        column = 0
+        while column + size <= grid_x:
+            if len(entities) == ships:
+                return entities
+            cells = [row * grid_x + column + offset for offset in range(size)]
+            entities[str(uuid4())] = {'cells': cells, 'size': size, 'direction': 0}
+            column += size + 1
+            size = size % 4 + 1
+    return entities if len(entities) == ships else None
+
+
+def run_sync(coroutine):
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError('coroutine suspended')
+
+
+def measure(function, repeat: int) -> dict[str, float]:
+    timer = timeit.Timer(function)
+    loops, _ = timer.autorange()
+    timings = [elapsed / loops * 1e6 for elapsed in timer.repeat(repeat, loops)]
+    return {
+        'loops': loops,
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def run_child(ships: int, repeat: int) -> dict[str, dict]:
+    from api.config import settings
+    from api.metrics import Histogram
+    from api.session.game_state import GameState
+    from api.session.placement import validate_placement
+    from api.session.schemas import Entities, HitResponse, PlayerPlacement, ws_message_adapter
+    from api.session.websocket_frames import (
+        HIT_CODE,
+        HIT_STRUCT,
+        NO_ENTITY,
+        decode_binary_message,
+        encode_frame,
+        encode_hit_frames,
+    )
+    from api.session.websocket_request_types import WsRequestType
+    from api.session.websocket_utils import ws_receive_message
+    from tests.fakes import FakeWebSocket
+
+    grid_size = settings.GRID_SIZE_X * settings.GRID_SIZE_Y
+    entities = tile_fleet(ships, settings.GRID_SIZE_X, settings.GRID_SIZE_Y)
+    if entities is None:
+        return {}
+    ship_cells = [cell for entity in entities.values() for cell in entity['cells']]
+    placement = PlayerPlacement(entities=entities)
+    placement_frame = json.dumps({'type': 'PlayerPlacementReady', 'detail': {'entities': entities}})
+    entity_id = next(iter(entities))
+    hit_frame = json.dumps({'type': 'Hit', 'detail': {'cell': grid_size - 1, 'entityId': entity_id}})
+    binary_hit_frame = HIT_STRUCT.pack(HIT_CODE, grid_size - 1, NO_ENTITY)
+    shots = ship_cells[:1000] + list(range(0, grid_size, max(1, grid_size // 1000)))[:1000]
+    invalid_hit_frame = json.dumps({'type': 'Hit', 'detail': {'entityId': entity_id}})
+    player_id = uuid4()
+    latency = Histogram('micro_latency_seconds', '', 'type')
+
+    def receive(frames: list[str | bytes]):
+        websocket = FakeWebSocket(frames, repeat=True)
+        return lambda: run_sync(ws_receive_message(websocket))
+
+    def build_game() -> GameState:
+        game = GameState(uuid4())
+        game.add_player(player_id, placement.entities)
+        return game
+
+    def resolve_shots() -> None:
+        game = build_game()
+        for cell in shots:
+            game.resolve_hit(player_id, cell)
+
+    results = {
+        'validate_placement': measure(lambda: validate_placement(placement), repeat),
+        'parse_placement': measure(lambda: ws_message_adapter.validate_json(placement_frame), repeat),
+        'parse_hit': measure(lambda: ws_message_adapter.validate_json(hit_frame), repeat),
+        'parse_hit_binary': measure(lambda: decode_binary_message(binary_hit_frame), repeat),
+        'receive_hit': measure(receive([hit_frame]), repeat),
+        'receive_hit_binary': measure(receive([binary_hit_frame]), repeat),
+        'receive_placement': measure(receive([placement_frame]), repeat),
+        'receive_invalid_hit': measure(receive([invalid_hit_frame, hit_frame]), repeat),
+        'add_player': measure(build_game, repeat),
+        'hit_response': measure(
+            lambda: HitResponse(cell=grid_size - 1, entity_id=entity_id, status='hit').model_dump(by_alias=True),
+            repeat
+        ),
+        'observe_latency': measure(lambda: latency.labels('Hit').observe(grid_size), repeat),
+        'encode_hit_frames': measure(lambda: encode_hit_frames(grid_size - 1, entity_id, 'hit'), repeat),
+        'entities_to_dict': measure(lambda: Entities(entities=placement.entities).to_dict(), repeat),
+        'encode_entities_frame': measure(
+            lambda: encode_frame(WsRequestType.ENEMY_ENTITIES, Entities(entities=placement.entities).to_dict()),
+            repeat
+        ),
+    }
+    shot_timing = measure(resolve_shots, repeat)
+    build_timing = results['add_player']
+    results['resolve_hit'] = {
+        'loops': shot_timing['loops'] * len(shots),
+        'min': max(0.0, shot_timing['min'] - build_timing['min']) / len(shots),
+        'median': max(0.0, shot_timing['median'] - build_timing['median']) / len(shots),
+        'stdev': shot_timing['stdev'] / len(shots),
+    }
+    return results
+
+
+def run_suite(grids: list[str], fleets: list[int], repeat: int) -> dict[str, dict]:
+    results = {}
+    for grid in grids:
+        grid_x, grid_y = grid.split('x')
+        for ships in fleets:
+            fleet = ','.join(str(index % 4 + 1) for index in range(ships))
+            environment = dict(
+                os.environ,
+                GRID_SIZE_X=grid_x,
+                GRID_SIZE_Y=grid_y,
+                FLEET=fleet,
+                LOGGING_LEVEL='30',
+                WS_MESSAGE_RATE='1e9',
+                WS_MESSAGE_BURST='1e9',
+                WS_TYPE_RATE='1e9',
+                WS_TYPE_BURST='1e9',
+                WS_MAX_INVALID_FRAMES=str(2 ** 62),
+            )
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.micro', '--child', '--ships', str(ships), '--repeat', str(repeat)],
+                env=environment,
+                capture_output=True,
+                check=True,
+                text=True,
+            ).stdout
+            case = json.loads(output)
+            if not case:
+                print(f'{grid}/ships={ships}: fleet does not fit, skipped')
+                continue
+            results[f'{grid}/ships={ships}'] = case
+            for name, timing in case.items():
+                print(
+                    f'{grid:>11} ships={ships:<6} {name:<22} '
+                    f'median={timing["median"]:12.3f}us min={timing["min"]:12.3f}us'
+                )
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> int:
+    regressions = 0
+    for case, timings in results.items():
+        for name, timing in timings.items():
+            previous = baseline.get(case, {}).get(name)
+            if previous is None or not previous['median']:
+                continue
+            ratio = timing['median'] / previous['median']
+            marker = ''
+            if ratio > 1 + threshold:
+                marker = '  REGRESSION'
+                regressions += 1
+            elif ratio < 1 - threshold:
+                marker = '  improved'
+            print(
+                f'{case:<24} {name:<22} '
+                f'{previous["median"]:12.3f}us -> {timing["median"]:12.3f}us {ratio:6.2f}x{marker}'
+            )
+    return regressions
+
+
+def main(args: argparse.Namespace) -> int:
+    if args.child:
+        print(json.dumps(run_child(args.ships, args.repeat)))
+        return 0
+
+    grids = args.grids.split(',')
+    fleets = [int(ships) for ships in args.fleets.split(',')]
+    results = run_suite(grids, fleets, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results,
+            }, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        print(f'regressions: {regressions}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Micro-benchmark per-shot game logic, schema parsing and frame encoding'
+    )
+    parser.add_argument('--grids', default='10x10,100x100,1000x1000')
+    parser.add_argument('--fleets', default='10,100,1000')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='compare against results saved with --output')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative slowdown reported as a regression')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--ships', type=int, default=10, help=argparse.SUPPRESS)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,79 @@
+import argparse
+import json
+import time
+from uuid import uuid4
+
+from api.config import settings
+from api.schemas import BaseSchema
+from api.session.schemas import Hit, PlayerPlacement, ws_message_adapter
+from benchmarks.common import summarize
+
+GRID_SIZE = settings.GRID_SIZE_X * settings.GRID_SIZE_Y
+
+
+class LegacyMessage(BaseSchema):
+    type: str
+    detail: dict
+
+
+def legacy_parse(data: str, detail_model: type[BaseSchema]) -> BaseSchema:
+    message = LegacyMessage(**json.loads(data))
+    return detail_model(**message.detail)
+
+
+def typed_parse(data: str) -> BaseSchema:
+    return ws_message_adapter.validate_json(data).detail
+
+
+def hit_frame() -> str:
+    return json.dumps({'type': 'Hit', 'detail': {'cell': GRID_SIZE - 1, 'entityId': str(uuid4())}})
+
+
+def placement_frame() -> str:
+    board = ['0'] * GRID_SIZE
+    entities = {}
+    for row in range(0, settings.GRID_SIZE_Y, 2):
+        cells = [row * settings.GRID_SIZE_X + column for column in range(4)]
+        for cell in cells:
+            board[cell] = '1'
+        entities[str(uuid4())] = {'cells': cells, 'size': len(cells), 'direction': 0}
+    return json.dumps({
+        'type': 'PlayerPlacementReady',
+        'detail': {'board': ''.join(board), 'entities': entities}
+    })
+
+
+def measure(parse, repeat: int, rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter_ns()
+        for _ in range(repeat):
+            parse()
+        timings.append((time.perf_counter_ns() - started) / repeat / 1000)
+    return timings
+
+
+def main(args: argparse.Namespace) -> None:
+    frames = {
+        'Hit': (hit_frame(), Hit),
+        'PlayerPlacementReady': (placement_frame(), PlayerPlacement),
+    }
+    for name, (data, detail_model) in frames.items():
+        assert legacy_parse(data, detail_model) == typed_parse(data)
+        legacy = summarize(measure(lambda: legacy_parse(data, detail_model), args.repeat, args.rounds))
+        typed = summarize(measure(lambda: typed_parse(data), args.repeat, args.rounds))
+        print(
+            f'{name:<22} bytes={len(data):<6} '
+            f'legacy us: p50={legacy["p50"]:7.2f} p99={legacy["p99"]:7.2f}  '
+            f'typed us: p50={typed["p50"]:7.2f} p99={typed["p99"]:7.2f}  '
+            f'speedup={legacy["p50"] / typed["p50"]:5.2f}x'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Compare multi-pass and single-pass parsing of inbound websocket frames'
+    )
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=30)
+    main(parser.parse_args())
@@ -0,0 +1,27 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy.exc import SQLAlchemyError
+
+os.environ['LOGGING_LEVEL'] = '30'
+os.environ['GRID_SIZE_X'] = '10'
+os.environ['GRID_SIZE_Y'] = '10'
+os.environ['FLEET'] = '4,3,3,2,2,2,1,1,1,1'
+
+
+@pytest.fixture
+def postgres() -> None:
+    from api.database import engine
+
+    async def connect() -> None:
+        try:
+            async with engine.connect():
+                pass
+        finally:
+            await engine.dispose()
+
+    try:
+        asyncio.run(asyncio.wait_for(connect(), 5))
+    except (OSError, TimeoutError, SQLAlchemyError) as exc:
+        pytest.skip(f'Postgres is not reachable: {exc}')
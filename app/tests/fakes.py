@@ -0,0 +1,29 @@
+from itertools import cycle
+
+from starlette.websockets import WebSocketState
+
+
+class FakeWebSocket:
+    def __init__(
+            self,
+            frames: list[str | bytes] = (),
+            client_state: WebSocketState = WebSocketState.CONNECTED,
+            repeat: bool = False
+    ) -> None:
+        self.scope = {}
+        self.client_state = client_state
+        self.application_state = WebSocketState.CONNECTED
+        self.close_codes = []
+        messages = [
+            {'type': 'websocket.receive', 'bytes': frame} if isinstance(frame, bytes)
+            else {'type': 'websocket.receive', 'text': frame}
+            for frame in frames
+        ]
+        self.messages = cycle(messages) if repeat else iter(messages)
+
+    async def receive(self) -> dict:
+        return next(self.messages, {'type': 'websocket.disconnect', 'code': 1000})
+
+    async def close(self, code: int = 1000) -> None:
+        self.application_state = WebSocketState.DISCONNECTED
+        self.close_codes.append(code)
@@ -0,0 +1,72 @@
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+import fakeredis
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from api.config import settings
+from api.session import backplane as backplane_module
+from api.session import redis_services, services
+from api.session.backplane import backplane
+from api.session.routers import router
+from api.session.services import PlayerContext
+from api.session.websocket_manager import manager
+
+MAX_INVALID_FRAMES = 3
+
+
+@pytest.fixture
+def deleted_players(monkeypatch: pytest.MonkeyPatch) -> list:
+    fake_redis = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(backplane_module, 'redis_client', fake_redis)
+    monkeypatch.setattr(redis_services, 'redis_client', fake_redis)
+    monkeypatch.setattr(settings, 'WS_MESSAGE_RATE', 0)
+    monkeypatch.setattr(settings, 'WS_MAX_INVALID_FRAMES', MAX_INVALID_FRAMES)
+
+    deleted = []
+    session_id = uuid4()
+
+    async def get_player_context(player_id):
+        return PlayerContext(player_id, session_id, None)
+
+    async def delete_player(player_id):
+        deleted.append(player_id)
+
+    async def get_enemy(player_id, session_id):
+        return None
+
+    async def delete_session(session_id):
+        return None
+
+    monkeypatch.setattr(services, 'get_player_context', get_player_context)
+    monkeypatch.setattr(services, 'delete_player', delete_player)
+    monkeypatch.setattr(services, 'get_enemy', get_enemy)
+    monkeypatch.setattr(services, 'delete_session', delete_session)
+    return deleted
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await backplane.start()
+    yield
+    await backplane.stop()
+
+
+def test_invalid_frames_close_once_and_remove_player(deleted_players: list) -> None:
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(router)
+    player_id = uuid4()
+
+    with TestClient(app) as client:
+        with client.websocket_connect(f'/api/v1/session/ws?player_id={player_id}') as websocket:
+            for _ in range(MAX_INVALID_FRAMES):
+                websocket.send_text('{"type": "Hit", "detail": {}}')
+            with pytest.raises(WebSocketDisconnect) as exc:
+                websocket.receive_text()
+
+    assert exc.value.code == status.WS_1008_POLICY_VIOLATION
+    assert deleted_players == [player_id]
+    assert player_id not in manager.active_connections
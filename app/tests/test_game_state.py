@@ -0,0 +1,43 @@
+from uuid import UUID, uuid4
+
+import pytest
+
+from api.session.game_state import GameState
+from api.session.schemas import EntityData
+
+PLAYER_ID = uuid4()
+SHIP_ID = uuid4()
+BOAT_ID = uuid4()
+
+
+def make_game() -> GameState:
+    game = GameState(uuid4())
+    entities: dict[UUID, EntityData] = {
+        SHIP_ID: EntityData(cells=[0, 1], size=2, direction=0),
+        BOAT_ID: EntityData(cells=[20], size=1, direction=0),
+    }
+    game.add_player(PLAYER_ID, entities)
+    return game
+
+
+@pytest.mark.parametrize(('shots', 'results'), [
+    ([5], [('miss', '')]),
+    ([0], [('hit', str(SHIP_ID))]),
+    ([0, 1], [('hit', str(SHIP_ID)), ('destroy', str(SHIP_ID))]),
+    ([20], [('destroy', str(BOAT_ID))]),
+    ([0, 0], [('hit', str(SHIP_ID)), ('repeat', '')]),
+    ([5, 5], [('miss', ''), ('repeat', '')]),
+    ([0, 1, 20], [('hit', str(SHIP_ID)), ('destroy', str(SHIP_ID)), ('win', str(BOAT_ID))]),
+])
+def test_resolve_hit(shots: list[int], results: list[tuple[str, str]]) -> None:
+    game = make_game()
+    assert [game.resolve_hit(PLAYER_ID, cell) for cell in shots] == results
+
+
+def test_resolve_hit_tracks_changes() -> None:
+    game = make_game()
+    game.turn = PLAYER_ID
+    for cell in (0, 5, 0):
+        game.resolve_hit(PLAYER_ID, cell)
+    assert game.pop_changes() == (game.session_id, PLAYER_ID, 0, [(PLAYER_ID, [0, 5], 2, {str(SHIP_ID): 1})])
+    assert game.pop_changes() == (game.session_id, PLAYER_ID, 1, [])
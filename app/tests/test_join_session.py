@@ -0,0 +1,57 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert, select
+
+from api.database import engine
+from api.services import execute_query
+from api.session import routers, services
+from api.session.models import player, session
+
+
+def test_concurrent_joins_fill_session_once(postgres: None) -> None:
+    async def run() -> tuple:
+        query = insert(session).values(name=f'test-{uuid4().hex}', password=b'').returning(session.c.id)
+        row = await execute_query(query)
+        try:
+            joined = await asyncio.gather(*(services.join_session(row.id) for _ in range(4)))
+            players = await execute_query(select(player.c.id).where(player.c.session_id == row.id), first_only=False)
+            filled = await execute_query(select(session.c.is_ready).where(session.c.id == row.id))
+            return joined, players, filled.is_ready
+        finally:
+            await execute_query(delete(player).where(player.c.session_id == row.id), return_result=False)
+            await execute_query(delete(session).where(session.c.id == row.id), return_result=False)
+            await engine.dispose()
+
+    joined, players, is_ready = asyncio.run(run())
+
+    winners = [joined_player for joined_player in joined if joined_player is not None]
+    assert len(winners) == 1
+    assert [joined_player.id for joined_player in players] == [winners[0].id]
+    assert is_ready is True
+
+
+def test_login_losing_join_race_is_rejected(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def get_session(name):
+        return SimpleNamespace(id=uuid4(), is_ready=False, password=b'')
+
+    async def validate_password(password, hashed_password):
+        return True
+
+    async def join_session(session_id):
+        return None
+
+    monkeypatch.setattr(services, 'get_session', get_session)
+    monkeypatch.setattr(services, 'join_session', join_session)
+    monkeypatch.setattr(routers, 'validate_password', validate_password)
+    app = FastAPI()
+    app.include_router(routers.router)
+
+    response = TestClient(app).post('/api/v1/session/login', json={'name': 'lobby', 'password': 'secret'})
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert response.json() == {'detail': 'Session Already Full'}
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import fakeredis
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from api.session import redis_services, services
+from api.session.routers import router
+from api.session.utils import decode_cursor, encode_cursor
+
+CREATED_AT = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+def test_cursor_round_trip() -> None:
+    session_id = uuid4()
+    assert decode_cursor(encode_cursor(CREATED_AT, session_id)) == (CREATED_AT, session_id)
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    monkeypatch.setattr(redis_services, 'redis_client', fakeredis.FakeAsyncRedis())
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize('cursor', ['not a cursor', 'bm9waXBl', encode_cursor(CREATED_AT, uuid4())[:-8], '_w=='])
+def test_malformed_cursor_is_rejected(client: TestClient, cursor: str) -> None:
+    response = client.get('/api/v1/session', params={'cursor': cursor})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+def test_sessions_are_paged_by_keyset(monkeypatch: pytest.MonkeyPatch) -> None:
+    queries = []
+
+    async def execute_query(query, **kwargs):
+        queries.append(query)
+        return []
+
+    monkeypatch.setattr(services, 'execute_query', execute_query)
+    asyncio.run(services.get_sessions(
+        is_ready=False, desc_sort=True, name_prefix='ab', after=(CREATED_AT, uuid4()), limit=11
+    ))
+
+    sql = str(queries[0].compile(dialect=postgresql.dialect())).replace('\n', ' ')
+    assert '(session.created_at, session.id) < (' in sql
+    assert 'ORDER BY session.created_at DESC, session.id DESC' in sql
+    assert 'LIMIT' in sql
+    assert 'OFFSET' not in sql
+
+
+def test_lobby_pages_are_cached_until_change(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    rows = [
+        SimpleNamespace(id=uuid4(), name=f'session-{index}', created_at=CREATED_AT - timedelta(seconds=index))
+        for index in range(3)
+    ]
+    calls = []
+
+    async def get_sessions(**kwargs):
+        calls.append(kwargs)
+        return rows[:kwargs['limit']]
+
+    monkeypatch.setattr(services, 'get_sessions', get_sessions)
+
+    first = client.get('/api/v1/session', params={'limit': 2})
+    cached = client.get('/api/v1/session', params={'limit': 2})
+    assert len(calls) == 1
+    assert cached.content == first.content
+    assert [row['name'] for row in first.json()] == ['session-0', 'session-1']
+    assert first.headers['X-Next-Cursor'] == cached.headers['X-Next-Cursor']
+    assert decode_cursor(first.headers['X-Next-Cursor']) == (rows[1].created_at, rows[1].id)
+
+    asyncio.run(redis_services.publish_lobby_change('lobby', '{}'))
+    client.get('/api/v1/session', params={'limit': 2})
+    assert len(calls) == 2
@@ -0,0 +1,47 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.metrics import Histogram, MetricsRegistry
+from api.routers import router
+
+
+def test_render_prometheus_text() -> None:
+    metrics = MetricsRegistry()
+    requests = metrics.counter('test_requests_total', 'Requests served', 'method')
+    latency = metrics.register(Histogram('test_latency_seconds', 'Request latency', 'method', buckets=(0.001, 0.01)))
+    metrics.gauge('test_connections', 'Open connections', lambda: 3)
+
+    requests.labels('get').inc()
+    requests.labels('get').inc(2)
+    requests.labels('post').inc()
+    for nanoseconds in (500_000, 1_000_000, 5_000_000, 20_000_000):
+        latency.labels('get').observe(nanoseconds)
+
+    assert metrics.render() == '\n'.join([
+        '# HELP test_requests_total Requests served',
+        '# TYPE test_requests_total counter',
+        'test_requests_total{method="get"} 3',
+        'test_requests_total{method="post"} 1',
+        '# HELP test_latency_seconds Request latency',
+        '# TYPE test_latency_seconds histogram',
+        'test_latency_seconds_bucket{method="get",le="0.001"} 2',
+        'test_latency_seconds_bucket{method="get",le="0.01"} 3',
+        'test_latency_seconds_bucket{method="get",le="+Inf"} 4',
+        'test_latency_seconds_sum{method="get"} 0.0265',
+        'test_latency_seconds_count{method="get"} 4',
+        '# HELP test_connections Open connections',
+        '# TYPE test_connections gauge',
+        'test_connections 3',
+        '',
+    ])
+
+
+def test_metrics_endpoint_serves_registry() -> None:
+    app = FastAPI()
+    app.include_router(router)
+
+    response = TestClient(app).get('/metrics')
+
+    assert response.headers['content-type'] == 'text/plain; version=0.0.4; charset=utf-8'
+    assert '# TYPE battleship_redis_seconds histogram' in response.text
+    assert response.text.endswith('\n')
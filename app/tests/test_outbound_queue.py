@@ -0,0 +1,67 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+
+from api.config import OutboundOverflowPolicy, settings
+from api.session.outbound import OutboundQueue
+from api.session.websocket_request_types import WsRequestType
+from tests.fakes import FakeWebSocket
+
+
+def overflow(
+        monkeypatch: pytest.MonkeyPatch,
+        policy: OutboundOverflowPolicy,
+        sent: list[WsRequestType]
+) -> tuple[list[str], bool, list[int]]:
+    monkeypatch.setattr(settings, 'OUTBOUND_QUEUE_SIZE', 2)
+    monkeypatch.setattr(settings, 'OUTBOUND_OVERFLOW_POLICY', policy)
+    websocket = FakeWebSocket()
+
+    async def run() -> OutboundQueue:
+        player = OutboundQueue(uuid4(), websocket)
+        for message_type in sent:
+            player.send(message_type, message_type.value)
+        if player.writer is not None:
+            await player.writer
+        return player
+
+    player = asyncio.run(run())
+    return [data for _, data, _ in player.queue], player.overflowed, websocket.close_codes
+
+
+@pytest.mark.parametrize(('sent', 'queued', 'overflowed'), [
+    (
+        [WsRequestType.YOUR_TURN, WsRequestType.PLAYER_HIT, WsRequestType.YOUR_TURN],
+        ['PlayerHit', 'YourTurn'],
+        False,
+    ),
+    (
+        [WsRequestType.SNAPSHOT, WsRequestType.ENEMY_HIT, WsRequestType.SNAPSHOT, WsRequestType.SNAPSHOT],
+        ['EnemyHit', 'Snapshot'],
+        False,
+    ),
+    ([WsRequestType.PLAYER_HIT, WsRequestType.ENEMY_HIT, WsRequestType.PLAYER_HIT], [], True),
+    ([WsRequestType.PLAYER_HIT, WsRequestType.ENEMY_HIT, WsRequestType.YOUR_TURN], [], True),
+])
+def test_coalesce_only_replaces_state_frames(
+        monkeypatch: pytest.MonkeyPatch,
+        sent: list[WsRequestType],
+        queued: list[str],
+        overflowed: bool
+) -> None:
+    result = overflow(monkeypatch, OutboundOverflowPolicy.COALESCE, sent)
+    assert result[:2] == (queued, overflowed)
+    assert result[2] == ([status.WS_1013_TRY_AGAIN_LATER] if overflowed else [])
+
+
+def test_drop_keeps_queued_frames(monkeypatch: pytest.MonkeyPatch) -> None:
+    sent = [WsRequestType.PLAYER_HIT, WsRequestType.ENEMY_HIT, WsRequestType.YOUR_TURN]
+    assert overflow(monkeypatch, OutboundOverflowPolicy.DROP, sent) == (['PlayerHit', 'EnemyHit'], False, [])
+
+
+def test_disconnect_closes_with_try_again_later(monkeypatch: pytest.MonkeyPatch) -> None:
+    sent = [WsRequestType.YOUR_TURN, WsRequestType.YOUR_TURN, WsRequestType.YOUR_TURN]
+    expected = ([], True, [status.WS_1013_TRY_AGAIN_LATER])
+    assert overflow(monkeypatch, OutboundOverflowPolicy.DISCONNECT, sent) == expected
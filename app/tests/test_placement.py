@@ -0,0 +1,74 @@
+from uuid import uuid4
+
+import pytest
+
+from api.session.placement import HORIZONTAL, VERTICAL, validate_placement
+from api.session.schemas import PlayerPlacement
+
+FLEET = [
+    ([0, 1, 2, 3], HORIZONTAL),
+    ([20, 21, 22], HORIZONTAL),
+    ([26, 27, 28], HORIZONTAL),
+    ([40, 41], HORIZONTAL),
+    ([44, 45], HORIZONTAL),
+    ([48, 49], HORIZONTAL),
+    ([60], HORIZONTAL),
+    ([62], HORIZONTAL),
+    ([64], HORIZONTAL),
+    ([66], HORIZONTAL),
+]
+
+
+def make_board(ships: list[tuple[list[int], int]]) -> str:
+    occupied = {cell for cells, _ in ships for cell in cells}
+    return ''.join('1' if cell in occupied else '0' for cell in range(100))
+
+
+def make_placement(
+        ships: list[tuple[list[int], int]],
+        board: str | None = None,
+        sizes: dict[int, int] | None = None
+) -> PlayerPlacement:
+    sizes = sizes or {}
+    entities = {
+        str(uuid4()): {'cells': cells, 'size': sizes.get(index, len(cells)), 'direction': direction}
+        for index, (cells, direction) in enumerate(ships)
+    }
+    return PlayerPlacement(entities=entities, board=board)
+
+
+def replace_ship(index: int, cells: list[int], direction: int = HORIZONTAL) -> list[tuple[list[int], int]]:
+    ships = list(FLEET)
+    ships[index] = (cells, direction)
+    return ships
+
+
+@pytest.mark.parametrize(('placement', 'error'), [
+    (make_placement(FLEET), None),
+    (make_placement(FLEET, board=make_board(FLEET)), None),
+    (make_placement(replace_ship(3, [80, 90], VERTICAL)), None),
+    (make_placement([]), 'placement has no entities'),
+    (make_placement(FLEET[:-1]), 'do not match the configured fleet'),
+    (make_placement(replace_ship(9, [66, 67])), 'do not match the configured fleet'),
+    (make_placement(replace_ship(6, [2])), 'overlaps another entity'),
+    (make_placement(replace_ship(6, [14])), 'touches another entity'),
+    (make_placement(replace_ship(6, [4])), 'touches another entity'),
+    (make_placement(replace_ship(3, [9, 10])), 'wraps around the grid'),
+    (make_placement(replace_ship(1, [20, 21, 23])), 'cells are not contiguous'),
+    (make_placement(replace_ship(3, [40, 50])), 'cells are not contiguous'),
+    (make_placement(replace_ship(6, [100])), 'is out of the grid'),
+    (make_placement(replace_ship(6, [-1])), 'is out of the grid'),
+    (make_placement(replace_ship(3, [98, 108], VERTICAL)), 'is out of the grid'),
+    (make_placement(replace_ship(6, [60], 2)), 'has unknown direction'),
+    (make_placement(replace_ship(0, [0, 1, 2]), sizes={0: 4}), 'size does not match its cells'),
+    (make_placement(replace_ship(0, [0, 1, 2, 3, 4]), sizes={0: 4}), 'size does not match its cells'),
+    (make_placement(FLEET, board=make_board(FLEET)[:-1]), 'board length does not match grid size'),
+    (make_placement(FLEET, board=make_board(replace_ship(6, [80]))), 'board does not match entity cells'),
+    (make_placement(FLEET, board='1' * 100), 'board does not match entity cells'),
+])
+def test_validate_placement(placement: PlayerPlacement, error: str | None) -> None:
+    result = validate_placement(placement)
+    if error is None:
+        assert result is None
+    else:
+        assert result is not None and error in result
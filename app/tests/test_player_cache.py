@@ -0,0 +1,75 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from api.services import transaction
+from api.session import services
+from api.session.services import (
+    PlayerContext,
+    player_context_cache,
+    receive_player_context_invalidation
+)
+
+
+def test_invalidation_evicts_player_and_enemy_contexts() -> None:
+    player_id, enemy_id, other_id, session_id = uuid4(), uuid4(), uuid4(), uuid4()
+    player_context_cache.set(player_id, PlayerContext(player_id, session_id, enemy_id))
+    player_context_cache.set(enemy_id, PlayerContext(enemy_id, session_id, player_id))
+    player_context_cache.set(other_id, PlayerContext(other_id, uuid4(), uuid4()))
+
+    asyncio.run(receive_player_context_invalidation({'data': str(player_id).encode()}))
+
+    assert player_context_cache.get(player_id) is None
+    assert player_context_cache.get(enemy_id) is None
+    assert player_context_cache.get(other_id) is not None
+    player_context_cache.clear()
+
+
+@pytest.fixture
+def published(monkeypatch: pytest.MonkeyPatch) -> list:
+    messages = []
+
+    async def execute_query(query, **kwargs):
+        return None
+
+    async def publish(channel, data):
+        messages.append((channel, data))
+        return 1
+
+    monkeypatch.setattr(services, 'execute_query', execute_query)
+    monkeypatch.setattr(services.backplane, 'publish', publish)
+    yield messages
+    player_context_cache.clear()
+
+
+def test_delete_player_invalidates_after_commit(published: list) -> None:
+    player_id, enemy_id = uuid4(), uuid4()
+    player_context_cache.set(player_id, PlayerContext(player_id, uuid4(), enemy_id))
+
+    async def run() -> None:
+        async with transaction():
+            await services.delete_player(player_id)
+            assert player_context_cache.get(player_id) is not None
+            assert published == []
+
+    asyncio.run(run())
+
+    assert player_context_cache.get(player_id) is None
+    assert published == [(services.PLAYER_CACHE_CHANNEL, str(player_id))]
+
+
+def test_rolled_back_delete_keeps_cache(published: list) -> None:
+    player_id = uuid4()
+    player_context_cache.set(player_id, PlayerContext(player_id, uuid4(), uuid4()))
+
+    async def run() -> None:
+        async with transaction():
+            await services.delete_player(player_id)
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+
+    assert player_context_cache.get(player_id) is not None
+    assert published == []
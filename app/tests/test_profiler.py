@@ -0,0 +1,37 @@
+import asyncio
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import orjson
+
+from api.profiler import Profiler, current_profile
+from api.schemas import ProfilingTargets
+
+
+def test_profiled_connection_is_sampled_and_dumped(tmp_path: Path) -> None:
+    profiler = Profiler(0.001, str(tmp_path), 0.0)
+    player_id = uuid4()
+    profiler.apply(ProfilingTargets(players=[player_id]))
+
+    async def connection() -> None:
+        profiler.begin(player_id, uuid4())
+        current_profile.get().record('redis.get', 1_000_000)
+        deadline = time.monotonic() + 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0)
+
+    async def run() -> None:
+        await asyncio.create_task(connection())
+        while not list(tmp_path.glob('*.spans.json')):
+            await asyncio.sleep(0.01)
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+
+    assert profiler.active() == []
+    [spans] = tmp_path.glob('*.spans.json')
+    assert orjson.loads(spans.read_bytes())['spans'] == {'redis.get': {'count': 1, 'totalMs': 1.0, 'maxMs': 1.0}}
+    [folded] = tmp_path.glob('*.folded')
+    lines = folded.read_text().splitlines()
+    assert lines
+    assert all(line.startswith(('running;', 'waiting;')) for line in lines)
@@ -0,0 +1,34 @@
+from api.rate_limit import TokenBucket
+
+
+def make_bucket(rate: float, capacity: float) -> TokenBucket:
+    bucket = TokenBucket(rate, capacity)
+    bucket.updated = 0.0
+    return bucket
+
+
+def test_take_allows_burst_up_to_capacity() -> None:
+    bucket = make_bucket(1, 3)
+    assert [bucket.take(0.0) for _ in range(4)] == [True, True, True, False]
+
+
+def test_take_refills_at_rate() -> None:
+    bucket = make_bucket(10, 1)
+    assert bucket.take(0.0)
+    assert not bucket.take(0.05)
+    assert bucket.take(0.1)
+    assert not bucket.take(0.1)
+
+
+def test_take_caps_refill_at_capacity() -> None:
+    bucket = make_bucket(100, 2)
+    assert bucket.take(0.0)
+    assert bucket.take(0.0)
+    assert [bucket.take(60.0) for _ in range(3)] == [True, True, False]
+
+
+def test_rejected_take_keeps_partial_tokens() -> None:
+    bucket = make_bucket(1, 1)
+    assert bucket.take(0.0)
+    assert not bucket.take(0.5)
+    assert bucket.take(1.0)
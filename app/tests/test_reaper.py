@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import orjson
+import pytest
+
+from api.session import redis_services, services
+from api.session.backplane import backplane
+from api.session.lobby_manager import lobby
+from api.session.reaper import REAPER_CHANNEL, SessionReaper
+from api.session.websocket_manager import manager
+
+
+def test_sweep_spares_connected_sessions_and_releases_reaped(monkeypatch: pytest.MonkeyPatch) -> None:
+    connected_session, idle_session, old_session = uuid4(), uuid4(), uuid4()
+    connected_player, idle_player, old_player = uuid4(), uuid4(), uuid4()
+    candidates = [
+        SimpleNamespace(id=connected_session, is_too_old=False),
+        SimpleNamespace(id=idle_session, is_too_old=False),
+        SimpleNamespace(id=old_session, is_too_old=True),
+    ]
+    session_players = [
+        SimpleNamespace(id=connected_player, session_id=connected_session),
+        SimpleNamespace(id=idle_player, session_id=idle_session),
+        SimpleNamespace(id=old_player, session_id=old_session),
+    ]
+    touched, deleted, published = [], [], []
+
+    async def get_expired_sessions(idle_ttl, max_age, limit):
+        return candidates
+
+    async def get_session_players(session_ids):
+        return [row for row in session_players if row.session_id in session_ids]
+
+    async def get_connected_players(player_ids):
+        return {connected_player, old_player} & set(player_ids)
+
+    async def get_live_sessions(session_ids):
+        return set()
+
+    async def touch_sessions(session_ids):
+        touched.extend(session_ids)
+
+    async def delete_session_players(session_ids):
+        deleted.extend(session_ids)
+        return [row for row in session_players if row.session_id in session_ids]
+
+    async def delete_sessions(session_ids):
+        return [SimpleNamespace(id=session_id) for session_id in session_ids]
+
+    async def delete_redis_sessions(session_ids):
+        return len(session_ids)
+
+    async def publish(channel, data):
+        published.append((channel, orjson.loads(data)))
+        return 1
+
+    async def send_session_removed_message(session_id):
+        pass
+
+    monkeypatch.setattr(services, 'get_expired_sessions', get_expired_sessions)
+    monkeypatch.setattr(services, 'get_session_players', get_session_players)
+    monkeypatch.setattr(services, 'touch_sessions', touch_sessions)
+    monkeypatch.setattr(services, 'delete_session_players', delete_session_players)
+    monkeypatch.setattr(services, 'delete_sessions', delete_sessions)
+    monkeypatch.setattr(redis_services, 'get_live_sessions', get_live_sessions)
+    monkeypatch.setattr(redis_services, 'delete_sessions', delete_redis_sessions)
+    monkeypatch.setattr(manager, 'get_connected_players', get_connected_players)
+    monkeypatch.setattr(backplane, 'publish', publish)
+    monkeypatch.setattr(lobby, 'send_session_removed_message', send_session_removed_message)
+
+    reaper = SessionReaper(interval=60, batch_size=10, idle_ttl=60, max_age=3600)
+    assert asyncio.run(reaper.sweep()) == (2, 2, 2)
+    assert touched == [connected_session]
+    assert deleted == [idle_session, old_session]
+    assert published == [(REAPER_CHANNEL, {
+        'sessions': [str(idle_session), str(old_session)],
+        'players': [str(idle_player), str(old_player)],
+    })]
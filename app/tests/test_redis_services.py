@@ -0,0 +1,216 @@
+import asyncio
+from uuid import uuid4
+
+import fakeredis
+import pytest
+
+from api.session import redis_services
+from api.session.game_state import GameState, writer
+from api.session.redis_scripts import CLEAR_PLACEMENT, DELETE_SESSION, RESOLVE_HIT, SAVE_GAME_CHANGES
+from api.session.schemas import PlayerPlacement
+from api.session.websocket_manager import manager
+
+
+@pytest.fixture
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> fakeredis.FakeAsyncRedis:
+    client = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(redis_services, 'redis_client', client)
+    monkeypatch.setattr(redis_services, 'resolve_hit_script', client.register_script(RESOLVE_HIT))
+    monkeypatch.setattr(redis_services, 'save_game_changes_script', client.register_script(SAVE_GAME_CHANGES))
+    monkeypatch.setattr(redis_services, 'delete_session_script', client.register_script(DELETE_SESSION))
+    monkeypatch.setattr(redis_services, 'clear_placement_script', client.register_script(CLEAR_PLACEMENT))
+    return client
+
+
+def make_entities(*ships: list[int]) -> dict:
+    return PlayerPlacement(entities={
+        str(uuid4()): {'cells': cells, 'size': len(cells), 'direction': 0} for cells in ships
+    }).entities
+
+
+def test_placing_again_replaces_earlier_placement(fake_redis: fakeredis.FakeAsyncRedis) -> None:
+    session_id, player_id, enemy_id = uuid4(), uuid4(), uuid4()
+    first = make_entities([0, 1], [5])
+    second = make_entities([90, 91])
+
+    async def run() -> list:
+        await redis_services.set_player_data(session_id, player_id, first)
+        await redis_services.set_player_data(session_id, player_id, second)
+        results = []
+        for cell in (0, 1, 5, 90, 91):
+            await redis_services.set_turn(session_id, enemy_id)
+            results.append(await redis_services.resolve_hit(session_id, enemy_id, player_id, cell))
+        return results
+
+    results = asyncio.run(run())
+
+    assert [status for status, _ in results] == ['miss', 'miss', 'miss', 'hit', 'win']
+    fields = asyncio.run(fake_redis.hkeys(redis_services.session_key(session_id)))
+    assert not any(str(entity_id).encode() in field for entity_id in first for field in fields)
+
+
+def test_leaving_player_keeps_unflushed_hits(fake_redis: fakeredis.FakeAsyncRedis) -> None:
+    session_id, player_id, enemy_id = uuid4(), uuid4(), uuid4()
+    game = manager.games[session_id] = GameState(session_id)
+    game.add_player(player_id, make_entities([0, 1]))
+    game.add_player(enemy_id, make_entities([50]))
+    game.turn = enemy_id
+    game.resolve_hit(player_id, 0)
+    writer.mark(game)
+
+    manager.leave_game(session_id, player_id)
+    asyncio.run(writer.flush())
+
+    assert session_id in manager.games
+    manager.end_game(session_id)
+    hits = asyncio.run(fake_redis.smembers(redis_services.hits_key(session_id, player_id)))
+    assert hits == {b'0'}
+    remaining = asyncio.run(fake_redis.hget(redis_services.session_key(session_id), f'player:{player_id}:remaining'))
+    assert remaining == b'1'
+
+
+def test_finished_game_rejects_shots_and_reports_winner(fake_redis: fakeredis.FakeAsyncRedis) -> None:
+    session_id, player_id, enemy_id = uuid4(), uuid4(), uuid4()
+
+    async def run() -> tuple:
+        await redis_services.set_player_data(session_id, player_id, make_entities([0]))
+        await redis_services.set_player_data(session_id, enemy_id, make_entities([50]))
+        await redis_services.set_player_in_game(session_id, player_id)
+        await redis_services.set_player_in_game(session_id, enemy_id)
+        await redis_services.set_turn(session_id, player_id)
+        win = await redis_services.resolve_hit(session_id, player_id, enemy_id, 50)
+        after = [
+            await redis_services.resolve_hit(session_id, enemy_id, player_id, 0),
+            await redis_services.resolve_hit(session_id, player_id, enemy_id, 1),
+        ]
+        return (
+            win,
+            after,
+            await redis_services.get_game_snapshot(session_id, player_id, enemy_id),
+            await redis_services.get_game_snapshot(session_id, enemy_id, player_id),
+        )
+
+    win, after, player_snapshot, enemy_snapshot = asyncio.run(run())
+
+    assert win[0] == 'win'
+    assert after == [('finished', ''), ('finished', '')]
+    assert (player_snapshot['finished'], player_snapshot['won']) == (True, True)
+    assert (enemy_snapshot['finished'], enemy_snapshot['won']) == (True, False)
+
+
+def test_stale_write_behind_does_not_overwrite_redis(fake_redis: fakeredis.FakeAsyncRedis) -> None:
+    session_id, player_id, enemy_id = uuid4(), uuid4(), uuid4()
+    player_entities, enemy_entities = make_entities([0, 1]), make_entities([50, 51])
+    game = GameState(session_id)
+    game.add_player(player_id, player_entities)
+    game.add_player(enemy_id, enemy_entities)
+    game.turn = player_id
+
+    async def shoot_locally(cell: int) -> bool:
+        game.resolve_hit(enemy_id, cell)
+        writer.mark(game)
+        await writer.flush()
+        return game.stale
+
+    async def run() -> tuple:
+        await redis_services.set_player_data(session_id, player_id, player_entities)
+        await redis_services.set_player_data(session_id, enemy_id, enemy_entities)
+        await redis_services.set_turn(session_id, player_id)
+        first = await shoot_locally(50)
+        remote = await redis_services.resolve_hit(session_id, player_id, enemy_id, 60)
+        second = await shoot_locally(51)
+        return first, remote, second, await fake_redis.hgetall(redis_services.session_key(session_id))
+
+    first, remote, second, fields = asyncio.run(run())
+
+    assert (first, remote, second) == (False, ('miss', ''), True)
+    assert fields[b'turn'] == str(enemy_id).encode()
+    assert fields[f'player:{enemy_id}:remaining'.encode()] == b'1'
+    assert fields[b'version'] == b'2'
+
+
+def test_resolve_hit_enforces_turn_and_reports_outcomes(fake_redis: fakeredis.FakeAsyncRedis) -> None:
+    session_id, player_id, enemy_id = uuid4(), uuid4(), uuid4()
+    enemy_entities = make_entities([50, 51], [70])
+    ship_id, boat_id = (str(entity_id) for entity_id in enemy_entities)
+
+    async def run() -> list:
+        await redis_services.set_player_data(session_id, player_id, make_entities([0]))
+        await redis_services.set_player_data(session_id, enemy_id, enemy_entities)
+        await redis_services.set_turn(session_id, player_id)
+        return [
+            await redis_services.resolve_hit(session_id, enemy_id, player_id, 0),
+            await redis_services.resolve_hit(session_id, player_id, enemy_id, 50),
+            await redis_services.resolve_hit(session_id, player_id, enemy_id, 50),
+            await redis_services.resolve_hit(session_id, player_id, enemy_id, 51),
+            await redis_services.resolve_hit(session_id, player_id, enemy_id, 9),
+            await redis_services.resolve_hit(session_id, player_id, enemy_id, 70),
+            await redis_services.resolve_hit(session_id, enemy_id, player_id, 1),
+            await redis_services.resolve_hit(session_id, player_id, enemy_id, 70),
+        ]
+
+    assert asyncio.run(run()) == [
+        ('not_turn', ''),
+        ('hit', ship_id),
+        ('repeat', ''),
+        ('destroy', ship_id),
+        ('miss', ''),
+        ('not_turn', ''),
+        ('miss', ''),
+        ('win', boat_id),
+    ]
+    fields = asyncio.run(fake_redis.hgetall(redis_services.session_key(session_id)))
+    assert b'turn' not in fields
+    assert fields[f'player:{enemy_id}:remaining'.encode()] == b'0'
+
+
+def test_delete_session_removes_hit_sets(fake_redis: fakeredis.FakeAsyncRedis) -> None:
+    session_id, other_session_id, player_id, enemy_id = uuid4(), uuid4(), uuid4(), uuid4()
+
+    async def run() -> list:
+        for current_session_id in (session_id, other_session_id):
+            await redis_services.set_player_data(current_session_id, player_id, make_entities([0]))
+            await redis_services.set_player_data(current_session_id, enemy_id, make_entities([50]))
+            await redis_services.set_turn(current_session_id, player_id)
+            await redis_services.resolve_hit(current_session_id, player_id, enemy_id, 9)
+            await redis_services.resolve_hit(current_session_id, enemy_id, player_id, 8)
+        await redis_services.delete_session(session_id)
+        return sorted(await fake_redis.keys('session:*'))
+
+    assert asyncio.run(run()) == sorted([
+        redis_services.session_key(other_session_id).encode(),
+        redis_services.hits_key(other_session_id, player_id).encode(),
+        redis_services.hits_key(other_session_id, enemy_id).encode(),
+    ])
+    assert asyncio.run(redis_services.delete_sessions([other_session_id])) == 3
+    assert asyncio.run(fake_redis.keys('session:*')) == []
+
+
+def test_game_snapshot_contents(fake_redis: fakeredis.FakeAsyncRedis) -> None:
+    session_id, player_id, enemy_id = uuid4(), uuid4(), uuid4()
+    player_entities, enemy_entities = make_entities([0, 1]), make_entities([50])
+    player_ship_id, enemy_boat_id = str(next(iter(player_entities))), str(next(iter(enemy_entities)))
+
+    async def run() -> tuple:
+        await redis_services.set_player_data(session_id, player_id, player_entities)
+        await redis_services.set_player_data(session_id, enemy_id, enemy_entities)
+        before_game = await redis_services.get_game_snapshot(session_id, player_id, enemy_id)
+        await redis_services.set_player_in_game(session_id, player_id)
+        await redis_services.set_turn(session_id, player_id)
+        await redis_services.resolve_hit(session_id, player_id, enemy_id, 9)
+        await redis_services.resolve_hit(session_id, enemy_id, player_id, 1)
+        await redis_services.resolve_hit(session_id, enemy_id, player_id, 7)
+        return before_game, await redis_services.get_game_snapshot(session_id, player_id, enemy_id)
+
+    before_game, snapshot = asyncio.run(run())
+
+    assert before_game is None
+    assert snapshot == {
+        'yourTurn': True,
+        'finished': False,
+        'won': False,
+        'entities': {player_ship_id: {'cells': [0, 1], 'size': 2, 'direction': 0, 'hits': 1}},
+        'enemyEntities': {enemy_boat_id: {'cells': [50], 'size': 1, 'direction': 0, 'hits': 0}},
+        'playerHits': [9],
+        'enemyHits': [1, 7],
+    }
@@ -0,0 +1,51 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+from api.database import engine
+from api.services import execute_query, transaction
+from api.session.models import session
+
+
+async def insert_session(name: str) -> None:
+    await execute_query(insert(session).values(name=name, password=b''), return_result=False)
+
+
+async def find_session(name: str):
+    return await execute_query(select(session.c.id).where(session.c.name == name))
+
+
+def test_transaction_rolls_back_on_exception(postgres: None) -> None:
+    first, second = f'test-{uuid4().hex}', f'test-{uuid4().hex}'
+
+    async def run() -> tuple:
+        try:
+            with pytest.raises(RuntimeError):
+                async with transaction():
+                    await insert_session(first)
+                    await insert_session(second)
+                    assert await find_session(first) is not None
+                    raise RuntimeError
+            return await find_session(first), await find_session(second)
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(run()) == (None, None)
+
+
+def test_transaction_commits_all_statements(postgres: None) -> None:
+    first, second = f'test-{uuid4().hex}', f'test-{uuid4().hex}'
+
+    async def run() -> tuple:
+        try:
+            async with transaction():
+                await insert_session(first)
+                await insert_session(second)
+            return await find_session(first), await find_session(second)
+        finally:
+            await execute_query(delete(session).where(session.c.name.in_([first, second])), return_result=False)
+            await engine.dispose()
+
+    assert None not in asyncio.run(run())
@@ -0,0 +1,86 @@
+import struct
+from uuid import uuid4
+
+import orjson
+import pytest
+
+from api.session.websocket_frames import (
+    HIT_CODE,
+    HIT_RESPONSE_STRUCT,
+    HIT_STRUCT,
+    NO_ENTITY,
+    REQUEST_CODES,
+    decode_binary_message,
+    encode_frame,
+    encode_hit_frames,
+    text_to_binary,
+)
+from api.session.websocket_request_types import WsRequestType
+from api.session.websocket_response_types import WsResponseType
+
+ENTITY_ID = str(uuid4())
+
+
+@pytest.mark.parametrize('status', ['miss', 'hit', 'destroy'])
+def test_encode_hit_frames_text(status: str) -> None:
+    player_frame, enemy_frame = encode_hit_frames(99, ENTITY_ID, status)
+    detail = {'cell': 99, 'entityId': ENTITY_ID, 'status': status}
+    assert orjson.loads(player_frame.text) == {'type': 'PlayerHit', 'detail': detail}
+    assert orjson.loads(enemy_frame.text) == {'type': 'EnemyHit', 'detail': detail}
+    assert player_frame.type is WsRequestType.PLAYER_HIT
+    assert enemy_frame.type is WsRequestType.ENEMY_HIT
+
+
+@pytest.mark.parametrize('status', ['miss', 'hit', 'destroy'])
+def test_encode_hit_frames_binary_matches_text(status: str) -> None:
+    for frame in encode_hit_frames(70000, ENTITY_ID, status):
+        assert frame.binary == text_to_binary(frame.text)
+
+
+def test_encode_hit_frames_binary_layout() -> None:
+    player_frame, _ = encode_hit_frames(70000, '', 'miss')
+    code, cell, entity, status = HIT_RESPONSE_STRUCT.unpack(player_frame.binary)
+    assert code == REQUEST_CODES[WsRequestType.PLAYER_HIT]
+    assert cell == 70000
+    assert entity == NO_ENTITY
+    assert status == 0
+
+
+@pytest.mark.parametrize(('message_type', 'detail'), [
+    (WsRequestType.YOUR_TURN, None),
+    (WsRequestType.START_GAME, None),
+    (WsRequestType.ENEMY_ENTITIES, {'entities': {ENTITY_ID: {'cells': [1, 2], 'size': 2, 'direction': 0}}}),
+])
+def test_text_to_binary_matches_encode_frame(message_type: WsRequestType, detail: dict | None) -> None:
+    frame = encode_frame(message_type, detail)
+    assert text_to_binary(frame.text) == frame.binary
+    assert frame.binary[0] == REQUEST_CODES[message_type]
+
+
+@pytest.mark.parametrize(('entity', 'entity_id'), [
+    (NO_ENTITY, ''),
+    (bytes.fromhex(ENTITY_ID.replace('-', '')), ENTITY_ID),
+])
+def test_decode_binary_hit(entity: bytes, entity_id: str) -> None:
+    data = HIT_STRUCT.pack(HIT_CODE, 70000, entity)
+    assert decode_binary_message(data) == (WsResponseType.HIT, {'cell': 70000, 'entityId': entity_id})
+
+
+def test_decode_binary_without_detail() -> None:
+    assert decode_binary_message(bytes((0x84,))) == (WsResponseType.PLAYER_START_GAME, {})
+
+
+def test_decode_binary_with_json_detail() -> None:
+    detail = {'entities': {ENTITY_ID: {'cells': [1], 'size': 1, 'direction': 0}}}
+    data = bytes((0x82,)) + orjson.dumps(detail)
+    assert decode_binary_message(data) == (WsResponseType.PLAYER_PLACEMENT_READY, detail)
+
+
+@pytest.mark.parametrize(('data', 'error'), [
+    (bytes((0x7F,)), KeyError),
+    (bytes((HIT_CODE, 0, 0)), struct.error),
+    (bytes((0x82,)) + b'{', orjson.JSONDecodeError),
+])
+def test_decode_binary_rejects_malformed(data: bytes, error: type[Exception]) -> None:
+    with pytest.raises(error):
+        decode_binary_message(data)
@@ -0,0 +1,64 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+from starlette.websockets import WebSocketState
+
+from api.session.backplane import backplane
+from api.session.game_state import GameState
+from api.session.outbound import OutboundQueue
+from api.session.schemas import EntityData
+from api.session.websocket_manager import manager
+from tests.fakes import FakeWebSocket
+
+
+@pytest.fixture
+def unsubscribed(monkeypatch: pytest.MonkeyPatch) -> list:
+    channels = []
+
+    async def unsubscribe(channel: str) -> None:
+        channels.append(channel)
+
+    monkeypatch.setattr(backplane, 'unsubscribe', unsubscribe)
+    return channels
+
+
+def test_disconnect_current_websocket(unsubscribed: list) -> None:
+    player_id = uuid4()
+    websocket = FakeWebSocket(client_state=WebSocketState.DISCONNECTED)
+    manager.active_connections[player_id] = OutboundQueue(player_id, websocket)
+
+    assert asyncio.run(manager.disconnect(player_id, websocket))
+    assert player_id not in manager.active_connections
+    assert unsubscribed == [f'ws:player:{player_id}']
+    assert websocket.close_codes == []
+
+
+def test_disconnect_stale_websocket_keeps_reconnected_player(unsubscribed: list) -> None:
+    player_id = uuid4()
+    stale = FakeWebSocket()
+    current = OutboundQueue(player_id, FakeWebSocket())
+    manager.active_connections[player_id] = current
+
+    try:
+        assert not asyncio.run(manager.disconnect(player_id, stale, status.WS_1008_POLICY_VIOLATION))
+        assert manager.active_connections[player_id] is current
+    finally:
+        manager.active_connections.pop(player_id, None)
+    assert unsubscribed == []
+    assert stale.close_codes == [status.WS_1008_POLICY_VIOLATION]
+
+
+@pytest.mark.parametrize(('enemy_cells', 'finished'), [([], True), ([50], False)])
+def test_shot_out_of_turn_reports_finished_game(enemy_cells: list[int], finished: bool) -> None:
+    session_id, player_id, enemy_id = uuid4(), uuid4(), uuid4()
+    game = manager.games[session_id] = GameState(session_id)
+    game.add_player(player_id, {uuid4(): EntityData(cells=[0], size=1, direction=0)})
+    game.add_player(enemy_id, {uuid4(): EntityData(cells=enemy_cells, size=1, direction=0)})
+    websocket = FakeWebSocket(['{"type": "Hit", "detail": {"cell": 7}}'])
+
+    try:
+        assert asyncio.run(manager.handle_hit(websocket, session_id, player_id, enemy_id)) is finished
+    finally:
+        manager.end_game(session_id)
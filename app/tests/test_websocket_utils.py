@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from api.config import settings
+from api.session.exceptions import WsTooManyInvalidFrames
+from api.session.websocket_frames import HIT_CODE, HIT_STRUCT, NO_ENTITY
+from api.session.websocket_response_types import WsResponseType
+from api.session.websocket_utils import ws_limiter, ws_receive_message
+from tests.fakes import FakeWebSocket
+
+VALID_HIT = '{"type": "Hit", "detail": {"cell": 7}}'
+
+
+def receive(frames: list[str | bytes]) -> tuple:
+    websocket = FakeWebSocket(frames)
+    message = asyncio.run(ws_receive_message(websocket))
+    return message, ws_limiter(websocket).strikes
+
+
+@pytest.mark.parametrize(('frames', 'strikes'), [
+    ([VALID_HIT], 0),
+    ([HIT_STRUCT.pack(HIT_CODE, 7, NO_ENTITY)], 0),
+    (['{"detail": {"type": "Hit"}, "type": "Unknown"}', VALID_HIT], 1),
+    (['{"detail": {"type": "Hit"}}', VALID_HIT], 1),
+    (['["Hit"]', '{"type": ["Hit"]}', VALID_HIT], 2),
+    (['{"type": "Hit"', VALID_HIT], 1),
+    (['{"type": "Hit", "detail": {}}', VALID_HIT], 1),
+    ([b'', bytes((0x7F,)), bytes((HIT_CODE, 0)), VALID_HIT], 3),
+])
+def test_receive_message_reads_top_level_type(frames: list[str | bytes], strikes: int) -> None:
+    message, received_strikes = receive(frames)
+    assert message.type == WsResponseType.HIT
+    assert message.detail.cell == 7
+    assert received_strikes == strikes
+
+
+def test_rate_limited_frames_are_not_strikes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'WS_MESSAGE_RATE', 0.001)
+    monkeypatch.setattr(settings, 'WS_MESSAGE_BURST', 1)
+    monkeypatch.setattr(settings, 'WS_MAX_INVALID_FRAMES', 2)
+    websocket = FakeWebSocket([VALID_HIT] * 11)
+    asyncio.run(ws_receive_message(websocket))
+    with pytest.raises(WebSocketDisconnect):
+        asyncio.run(ws_receive_message(websocket))
+    assert ws_limiter(websocket).strikes == 0
+
+
+def test_invalid_frames_raise_at_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'WS_MAX_INVALID_FRAMES', 2)
+    with pytest.raises(WsTooManyInvalidFrames):
+        receive(['{}', '{}', VALID_HIT])